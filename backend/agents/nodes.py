@@ -88,7 +88,9 @@ def _search_result_to_dict(sr: SearchResult) -> dict:
     else:
         d["compare_data"] = None
     d["graph_data"] = sr.graph_data
-    d["metadata"] = sr.metadata
+    # Copied: search() results are cached and shared, and the API route adds
+    # total_elapsed_ms to this dict
+    d["metadata"] = dict(sr.metadata)
     return d
 
 
@@ -314,11 +316,12 @@ def rank_node(state: dict) -> dict:
     Falls back to the legacy search() pipeline if no candidates were gathered.
     """
     try:
-        from search.graph_traversal import get_graph_data
+        from concurrent.futures import ThreadPoolExecutor
+        from search.graph_traversal import get_graph_data, get_graph_index
         from search.persona_ranker import rank_candidates
         from search.persona_configs import PERSONAS, get_persona
         from search.query_parser import ParsedQuery
-        from graph.queries import get_driver
+        from graph.queries import get_shared_driver
 
         t_start = time.time()
         persona = state.get("persona", "value_investor")
@@ -360,80 +363,86 @@ def rank_node(state: dict) -> dict:
             attribute=parsed_intent.get("attribute"),
         )
 
-        driver = get_driver()
-        try:
-            if compare_data_raw:
-                # --- Compare query ---
-                all_candidates = _dicts_to_candidates(list(gathered.values()))
+        driver = get_shared_driver()
+        if compare_data_raw:
+            # --- Compare query ---
+            all_candidates = _dicts_to_candidates(list(gathered.values()))
+
+            # The graph covers every gathered company, so fetch it while ranking
+            company_ids = list(gathered.keys())
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                graph_future = pool.submit(get_graph_data, driver, company_ids)
                 ranked = rank_candidates(all_candidates, persona_config)
+                graph = graph_future.result()
+
+            # Build compare_data in the format downstream nodes expect
+            compare_out = _serialize_compare_data(compare_data_raw)
+
+            elapsed_ms = int((time.time() - t_start) * 1000)
+            search_dict = {
+                "query": _parsed_query_to_dict(parsed_query),
+                "persona": active_persona,
+                "persona_display": persona_config.display_name,
+                "results": _build_ranked_result_dicts(ranked),
+                "compare_data": compare_out,
+                "graph_data": graph,
+                "metadata": {
+                    "elapsed_ms": elapsed_ms,
+                    "candidate_count": len(all_candidates),
+                    "source": "agentic",
+                },
+            }
 
-                company_ids = list(gathered.keys())
-                graph = get_graph_data(driver, company_ids)
-
-                # Build compare_data in the format downstream nodes expect
-                compare_out = _serialize_compare_data(compare_data_raw)
-
-                elapsed_ms = int((time.time() - t_start) * 1000)
-                search_dict = {
-                    "query": _parsed_query_to_dict(parsed_query),
-                    "persona": active_persona,
-                    "persona_display": persona_config.display_name,
-                    "results": _build_ranked_result_dicts(ranked),
-                    "compare_data": compare_out,
-                    "graph_data": graph,
-                    "metadata": {
-                        "elapsed_ms": elapsed_ms,
-                        "candidate_count": len(all_candidates),
-                        "source": "agentic",
-                    },
-                }
+        else:
+            # --- Competitors / acquisition / attribute query ---
+            candidates = _dicts_to_candidates(list(gathered.values()))
 
+            # Acquisition queries always use strategic_acquirer weights
+            if parsed_query.query_type == "acquisition_target":
+                rank_persona = get_persona("strategic_acquirer")
+                acquirer = parsed_query.acquirer
             else:
-                # --- Competitors / acquisition / attribute query ---
-                candidates = _dicts_to_candidates(list(gathered.values()))
-
-                # Acquisition queries always use strategic_acquirer weights
-                if parsed_query.query_type == "acquisition_target":
-                    rank_persona = get_persona("strategic_acquirer")
-                    acquirer = parsed_query.acquirer
-                else:
-                    rank_persona = persona_config
-                    acquirer = ""
-
+                rank_persona = persona_config
+                acquirer = ""
+
+            # The top ids aren't known until ranking finishes, so speculatively
+            # fetch the graph for the center + every candidate meanwhile and
+            # cut it down to the top ids afterwards
+            candidate_ids = ([center_id] if center_id else []) + [c.company_id for c in candidates]
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                index_future = pool.submit(get_graph_index, driver, candidate_ids)
                 ranked = rank_candidates(candidates, rank_persona, acquirer=acquirer)
+                graph_index = index_future.result()
+
+            # Deduplicate + prepend center company for graph
+            top_ids = [r.company_id for r in ranked[:10]]
+            graph_ids = list(dict.fromkeys(([center_id] if center_id else []) + top_ids))
+            graph = graph_index.subgraph(graph_ids, center_id=center_id)
+
+            elapsed_ms = int((time.time() - t_start) * 1000)
+            search_dict = {
+                "query": _parsed_query_to_dict(parsed_query),
+                "persona": active_persona,
+                "persona_display": persona_config.display_name,
+                "results": _build_ranked_result_dicts(ranked),
+                "compare_data": None,
+                "graph_data": graph,
+                "metadata": {
+                    "elapsed_ms": elapsed_ms,
+                    "candidate_count": len(candidates),
+                    "source": "agentic",
+                },
+            }
 
-                # Deduplicate + prepend center company for graph
-                top_ids = [r.company_id for r in ranked[:10]]
-                graph_ids = list(dict.fromkeys(([center_id] if center_id else []) + top_ids))
-                graph = get_graph_data(driver, graph_ids, center_id=center_id)
-
-                elapsed_ms = int((time.time() - t_start) * 1000)
-                search_dict = {
-                    "query": _parsed_query_to_dict(parsed_query),
-                    "persona": active_persona,
-                    "persona_display": persona_config.display_name,
-                    "results": _build_ranked_result_dicts(ranked),
-                    "compare_data": None,
-                    "graph_data": graph,
-                    "metadata": {
-                        "elapsed_ms": elapsed_ms,
-                        "candidate_count": len(candidates),
-                        "source": "agentic",
-                    },
-                }
-
-            # Handle all_personas if requested (still uses legacy pipeline for speed)
-            all_persona_dicts = None
-            if state.get("all_personas"):
-                all_results = search_all_personas(state.get("query", ""))
-                all_persona_dicts = {
-                    p: _search_result_to_dict(sr) for p, sr in all_results.items()
-                }
-
-            return {"search_result": search_dict, "all_persona_results": all_persona_dicts}
+        # Handle all_personas if requested (still uses legacy pipeline for speed)
+        all_persona_dicts = None
+        if state.get("all_personas"):
+            all_results = search_all_personas(state.get("query", ""))
+            all_persona_dicts = {
+                p: _search_result_to_dict(sr) for p, sr in all_results.items()
+            }
 
-        finally:
-            driver.close()
+        return {"search_result": search_dict, "all_persona_results": all_persona_dicts}
 
     except Exception as e:
         return {"error": f"Ranking failed: {e}\n{traceback.format_exc()}"}
@@ -1,7 +1,7 @@
 """
 LangChain tools for the InvestorLens data-gathering agent.
 Each tool wraps existing graph traversal functions and returns JSON strings.
-Tools share the graph_traversal primitives; each creates its own driver per call.
+Tools share the graph_traversal primitives and the process-wide Neo4j driver.
 """
 import json
 import sys
@@ -10,15 +10,14 @@ import os
 from langchain_core.tools import tool
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from graph.queries import get_driver, get_company
+from graph.queries import get_shared_driver, get_company
 from search.graph_traversal import (
     get_competitors_to,
     get_compare_data,
     get_acquisition_targets,
     get_attribute_ranked,
-    _full_company_query,
+    _FULL_COMPANY_RETURN,
     _record_to_candidate,
-    _enrich_partnership_counts,
 )
 
 
@@ -65,28 +64,64 @@ def find_competitors(company_id: str, min_strength: float = 0.3) -> str:
         min_strength: Minimum competition strength threshold 0.0-1.0 (default 0.3).
                       Only filters COMPETES_WITH edges; DISRUPTS/SEGMENT edges are always included.
     """
-    driver = get_driver()
-    try:
-        candidates = get_competitors_to(driver, company_id)
-        if min_strength > 0.0:
-            filtered = []
-            for c in candidates:
-                has_only_competes = all(e.get("type") == "COMPETES_WITH" for e in c.graph_edges)
-                if has_only_competes and c.competition_strength < min_strength:
-                    continue
-                filtered.append(c)
-            candidates = filtered
-
-        result = {
-            "tool": "find_competitors",
-            "company_id": company_id,
-            "count": len(candidates),
-            "summary": f"Found {len(candidates)} competitors/adjacent companies for {company_id}",
-            "candidates": [_candidate_to_dict(c) for c in candidates],
-        }
-        return json.dumps(result)
-    finally:
-        driver.close()
+    driver = get_shared_driver()
+    # The ReAct LLM reads the shared theme names, as it does from find_adjacent
+    candidates = get_competitors_to(driver, company_id, needs_themes=True)
+    if min_strength > 0.0:
+        filtered = []
+        for c in candidates:
+            has_only_competes = all(e.get("type") == "COMPETES_WITH" for e in c.graph_edges)
+            if has_only_competes and c.competition_strength < min_strength:
+                continue
+            filtered.append(c)
+        candidates = filtered
+
+    result = {
+        "tool": "find_competitors",
+        "company_id": company_id,
+        "count": len(candidates),
+        "summary": f"Found {len(candidates)} competitors/adjacent companies for {company_id}",
+        "candidates": [_candidate_to_dict(c) for c in candidates],
+    }
+    return json.dumps(result)
+
+
+# Per-edge-type traversals used by find_adjacent, built once at import
+_ADJACENT_QUERIES = {
+    "DISRUPTS": f"""
+        MATCH (c:Company {{company_id: $cid}})-[r:DISRUPTS]-(t:Company)
+        RETURN {_FULL_COMPANY_RETURN},
+               r.strength AS strength,
+               CASE WHEN startNode(r) = c THEN 'disrupts' ELSE 'disrupted_by' END AS direction
+    """,
+    "PARTNERS_WITH": f"""
+        MATCH (c:Company {{company_id: $cid}})-[r:PARTNERS_WITH]-(t:Company)
+        RETURN {_FULL_COMPANY_RETURN}, r.strength AS strength
+    """,
+    "TARGETS_SAME_SEGMENT": f"""
+        MATCH (c:Company {{company_id: $cid}})-[:TARGETS_SAME_SEGMENT]->(s:Segment)<-[:TARGETS_SAME_SEGMENT]-(t:Company)
+        WHERE t.company_id <> $cid
+        RETURN {_FULL_COMPANY_RETURN}, s.display_name AS shared_segment
+    """,
+    "SHARES_INVESTMENT_THEME": f"""
+        MATCH (c:Company {{company_id: $cid}})-[:SHARES_INVESTMENT_THEME]->(th:InvestmentTheme)<-[:SHARES_INVESTMENT_THEME]-(t:Company)
+        WHERE t.company_id <> $cid
+        WITH t, collect(th.name) AS shared_themes, count(th) AS overlap
+        RETURN {_FULL_COMPANY_RETURN}, shared_themes, overlap
+    """,
+}
+
+# Builds the graph_edges entry for a row of the matching _ADJACENT_QUERIES query
+_ADJACENT_EDGES = {
+    "DISRUPTS": lambda r: {"type": "DISRUPTS", "strength": r["strength"], "direction": r["direction"]},
+    "PARTNERS_WITH": lambda r: {"type": "PARTNERS_WITH", "strength": r["strength"]},
+    "TARGETS_SAME_SEGMENT": lambda r: {"type": "TARGETS_SAME_SEGMENT", "segment": r["shared_segment"]},
+    "SHARES_INVESTMENT_THEME": lambda r: {
+        "type": "SHARES_INVESTMENT_THEME",
+        "themes": r["shared_themes"],
+        "overlap": r["overlap"],
+    },
+}
 
 
 @tool
@@ -98,8 +133,7 @@ def find_adjacent(company_id: str, edge_types: list) -> str:
         edge_types: List of edge types to traverse. Valid values:
                     DISRUPTS, PARTNERS_WITH, TARGETS_SAME_SEGMENT, SHARES_INVESTMENT_THEME
     """
-    valid_types = {"DISRUPTS", "PARTNERS_WITH", "TARGETS_SAME_SEGMENT", "SHARES_INVESTMENT_THEME"}
-    edge_types = [t for t in (edge_types or []) if t in valid_types]
+    edge_types = [t for t in (edge_types or []) if t in _ADJACENT_QUERIES]
 
     if not edge_types:
         return json.dumps({
@@ -108,98 +142,37 @@ def find_adjacent(company_id: str, edge_types: list) -> str:
             "candidates": [],
         })
 
-    driver = get_driver()
-    try:
-        candidates: dict = {}
-
-        for edge_type in edge_types:
-            if edge_type == "DISRUPTS":
-                query = f"""
-                MATCH (c:Company {{company_id: $cid}})-[r:DISRUPTS]-(t:Company)
-                RETURN {_full_company_query()},
-                       r.strength AS strength,
-                       CASE WHEN startNode(r) = c THEN 'disrupts' ELSE 'disrupted_by' END AS direction
-                """
-                with driver.session() as session:
-                    for rec in session.run(query, {"cid": company_id}):
-                        r = dict(rec)
-                        cid = r["company_id"]
-                        edge = {
-                            "type": "DISRUPTS",
-                            "strength": r.get("strength"),
-                            "direction": r.get("direction"),
-                        }
-                        if cid in candidates:
-                            candidates[cid].graph_edges.append(edge)
-                        else:
-                            candidates[cid] = _record_to_candidate(r, [edge])
-
-            elif edge_type == "PARTNERS_WITH":
-                query = f"""
-                MATCH (c:Company {{company_id: $cid}})-[r:PARTNERS_WITH]-(t:Company)
-                RETURN {_full_company_query()}, r.strength AS strength
-                """
-                with driver.session() as session:
-                    for rec in session.run(query, {"cid": company_id}):
-                        r = dict(rec)
-                        cid = r["company_id"]
-                        edge = {"type": "PARTNERS_WITH", "strength": r.get("strength")}
-                        if cid in candidates:
-                            candidates[cid].graph_edges.append(edge)
-                        else:
-                            candidates[cid] = _record_to_candidate(r, [edge])
-
-            elif edge_type == "TARGETS_SAME_SEGMENT":
-                query = f"""
-                MATCH (c:Company {{company_id: $cid}})-[:TARGETS_SAME_SEGMENT]->(s:Segment)<-[:TARGETS_SAME_SEGMENT]-(t:Company)
-                WHERE t.company_id <> $cid
-                RETURN {_full_company_query()}, s.display_name AS shared_segment
-                """
-                with driver.session() as session:
-                    for rec in session.run(query, {"cid": company_id}):
-                        r = dict(rec)
-                        cid = r["company_id"]
-                        edge = {"type": "TARGETS_SAME_SEGMENT", "segment": r.get("shared_segment")}
-                        if cid in candidates:
-                            candidates[cid].graph_edges.append(edge)
-                        else:
-                            candidates[cid] = _record_to_candidate(r, [edge])
-
-            elif edge_type == "SHARES_INVESTMENT_THEME":
-                query = f"""
-                MATCH (c:Company {{company_id: $cid}})-[:SHARES_INVESTMENT_THEME]->(th:InvestmentTheme)<-[:SHARES_INVESTMENT_THEME]-(t:Company)
-                WHERE t.company_id <> $cid
-                WITH t, collect(th.name) AS shared_themes, count(th) AS overlap
-                RETURN {_full_company_query()}, shared_themes, overlap
-                """
-                with driver.session() as session:
-                    for rec in session.run(query, {"cid": company_id}):
-                        r = dict(rec)
-                        cid = r["company_id"]
-                        edge = {
-                            "type": "SHARES_INVESTMENT_THEME",
-                            "themes": r.get("shared_themes"),
-                            "overlap": r.get("overlap"),
-                        }
-                        if cid in candidates:
-                            candidates[cid].graph_edges.append(edge)
-                        else:
-                            candidates[cid] = _record_to_candidate(r, [edge])
-
-        _enrich_partnership_counts(driver, candidates)
-        candidate_list = list(candidates.values())
-
-        result = {
-            "tool": "find_adjacent",
-            "company_id": company_id,
-            "edge_types": edge_types,
-            "count": len(candidate_list),
-            "summary": f"Found {len(candidate_list)} companies via {edge_types} edges from {company_id}",
-            "candidates": [_candidate_to_dict(c) for c in candidate_list],
-        }
-        return json.dumps(result)
-    finally:
-        driver.close()
+    driver = get_shared_driver()
+    candidates: dict = {}
+
+    # One session and one read transaction carry every requested traversal
+    def _run_all(tx):
+        return [(t, list(tx.run(_ADJACENT_QUERIES[t], cid=company_id))) for t in edge_types]
+
+    with driver.session() as session:
+        results = session.execute_read(_run_all)
+
+    for edge_type, records in results:
+        to_edge = _ADJACENT_EDGES[edge_type]
+        for r in records:
+            cid = r["company_id"]
+            edge = to_edge(r)
+            if cid in candidates:
+                candidates[cid].graph_edges.append(edge)
+            else:
+                candidates[cid] = _record_to_candidate(r, [edge])
+
+    candidate_list = list(candidates.values())
+
+    result = {
+        "tool": "find_adjacent",
+        "company_id": company_id,
+        "edge_types": edge_types,
+        "count": len(candidate_list),
+        "summary": f"Found {len(candidate_list)} companies via {edge_types} edges from {company_id}",
+        "candidates": [_candidate_to_dict(c) for c in candidate_list],
+    }
+    return json.dumps(result)
 
 
 @tool
@@ -209,39 +182,36 @@ def get_company_profile(company_id: str) -> str:
     Args:
         company_id: The company_id (e.g. 'snowflake', 'c3ai', 'databricks').
     """
-    driver = get_driver()
-    try:
-        profile = get_company(driver, company_id)
-        if not profile:
-            return json.dumps({
-                "tool": "get_company_profile",
-                "error": f"Company '{company_id}' not found in graph",
-            })
-
-        # Get top relationships
-        query = """
-        MATCH (c:Company {company_id: $cid})-[r]-(other)
-        RETURN type(r) AS rel_type,
-               CASE WHEN other:Company THEN other.name ELSE other.name END AS other_name,
-               CASE WHEN other:Company THEN other.company_id ELSE other.name END AS other_id,
-               labels(other)[0] AS other_type,
-               r.strength AS strength
-        LIMIT 30
-        """
-        relationships = []
-        with driver.session() as session:
-            for rec in session.run(query, {"cid": company_id}):
-                relationships.append(dict(rec))
-
-        result = {
+    driver = get_shared_driver()
+    profile = get_company(driver, company_id)
+    if not profile:
+        return json.dumps({
             "tool": "get_company_profile",
-            "company_id": company_id,
-            "profile": dict(profile),
-            "relationships": relationships,
-        }
-        return json.dumps(result, default=str)
-    finally:
-        driver.close()
+            "error": f"Company '{company_id}' not found in graph",
+        })
+
+    # Get top relationships
+    query = """
+    MATCH (c:Company {company_id: $cid})-[r]-(other)
+    RETURN type(r) AS rel_type,
+           CASE WHEN other:Company THEN other.name ELSE other.name END AS other_name,
+           CASE WHEN other:Company THEN other.company_id ELSE other.name END AS other_id,
+           labels(other)[0] AS other_type,
+           r.strength AS strength
+    LIMIT 30
+    """
+    with driver.session() as session:
+        relationships = session.execute_read(
+            lambda tx: [rec.data() for rec in tx.run(query, cid=company_id)]
+        )
+
+    result = {
+        "tool": "get_company_profile",
+        "company_id": company_id,
+        "profile": dict(profile),
+        "relationships": relationships,
+    }
+    return json.dumps(result, default=str)
 
 
 @tool
@@ -252,32 +222,29 @@ def compare_companies(company_a: str, company_b: str) -> str:
         company_a: First company_id.
         company_b: Second company_id.
     """
-    driver = get_driver()
-    try:
-        data = get_compare_data(driver, company_a, company_b)
-
-        result = {
-            "tool": "compare_companies",
-            "company_a": company_a,
-            "company_b": company_b,
-            "company_a_profile": _candidate_to_dict(data["company_a"]) if data.get("company_a") else None,
-            "company_b_profile": _candidate_to_dict(data["company_b"]) if data.get("company_b") else None,
-            "shared_edges": data.get("shared_edges", []),
-            "common_competitors": [
-                _candidate_to_dict(c) for c in data.get("common_competitors", [])
-            ],
-            "shared_segments": data.get("shared_segments", []),
-            "shared_themes": data.get("shared_themes", []),
-            "summary": (
-                f"Comparison of {company_a} vs {company_b}: "
-                f"{len(data.get('shared_edges', []))} direct edges, "
-                f"{len(data.get('common_competitors', []))} common competitors, "
-                f"{len(data.get('shared_themes', []))} shared themes"
-            ),
-        }
-        return json.dumps(result)
-    finally:
-        driver.close()
+    driver = get_shared_driver()
+    data = get_compare_data(driver, company_a, company_b)
+
+    result = {
+        "tool": "compare_companies",
+        "company_a": company_a,
+        "company_b": company_b,
+        "company_a_profile": _candidate_to_dict(data["company_a"]) if data.get("company_a") else None,
+        "company_b_profile": _candidate_to_dict(data["company_b"]) if data.get("company_b") else None,
+        "shared_edges": data.get("shared_edges", []),
+        "common_competitors": [
+            _candidate_to_dict(c) for c in data.get("common_competitors", [])
+        ],
+        "shared_segments": data.get("shared_segments", []),
+        "shared_themes": data.get("shared_themes", []),
+        "summary": (
+            f"Comparison of {company_a} vs {company_b}: "
+            f"{len(data.get('shared_edges', []))} direct edges, "
+            f"{len(data.get('common_competitors', []))} common competitors, "
+            f"{len(data.get('shared_themes', []))} shared themes"
+        ),
+    }
+    return json.dumps(result)
 
 
 @tool
@@ -291,21 +258,18 @@ def find_acquisition_targets(acquirer: str, compete_with: str = "") -> str:
         acquirer: The company_id of the potential acquirer (e.g. 'bigquery' for Google).
         compete_with: The company_id the acquirer wants to compete against (e.g. 'palantir').
     """
-    driver = get_driver()
-    try:
-        candidates = get_acquisition_targets(driver, acquirer, compete_with)
-
-        result = {
-            "tool": "find_acquisition_targets",
-            "acquirer": acquirer,
-            "compete_with": compete_with,
-            "count": len(candidates),
-            "summary": f"Found {len(candidates)} acquisition targets for {acquirer} to compete with {compete_with}",
-            "candidates": [_candidate_to_dict(c) for c in candidates],
-        }
-        return json.dumps(result)
-    finally:
-        driver.close()
+    driver = get_shared_driver()
+    candidates = get_acquisition_targets(driver, acquirer, compete_with)
+
+    result = {
+        "tool": "find_acquisition_targets",
+        "acquirer": acquirer,
+        "compete_with": compete_with,
+        "count": len(candidates),
+        "summary": f"Found {len(candidates)} acquisition targets for {acquirer} to compete with {compete_with}",
+        "candidates": [_candidate_to_dict(c) for c in candidates],
+    }
+    return json.dumps(result)
 
 
 @tool
@@ -320,20 +284,17 @@ def search_by_attribute(attribute: str, limit: int = 20) -> str:
                    market_cap_b, revenue_ttm_b, operating_margin, yoy_employee_growth
         limit: Maximum number of results (default 20, max 37).
     """
-    driver = get_driver()
-    try:
-        candidates = get_attribute_ranked(driver, attribute, limit=limit)
-
-        result = {
-            "tool": "search_by_attribute",
-            "attribute": attribute,
-            "count": len(candidates),
-            "summary": f"Top {len(candidates)} companies by {attribute}",
-            "candidates": [_candidate_to_dict(c) for c in candidates],
-        }
-        return json.dumps(result)
-    finally:
-        driver.close()
+    driver = get_shared_driver()
+    candidates = get_attribute_ranked(driver, attribute, limit=limit)
+
+    result = {
+        "tool": "search_by_attribute",
+        "attribute": attribute,
+        "count": len(candidates),
+        "summary": f"Top {len(candidates)} companies by {attribute}",
+        "candidates": [_candidate_to_dict(c) for c in candidates],
+    }
+    return json.dumps(result)
 
 
 # Export the tool list for LLM binding and ToolNode
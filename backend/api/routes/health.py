@@ -7,8 +7,8 @@ import os
 from fastapi import APIRouter
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
-from config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
 from api.models import HealthResponse
+from graph.queries import get_shared_driver
 
 router = APIRouter()
 
@@ -21,13 +21,11 @@ def health():
     company_count = 0
 
     try:
-        from neo4j import GraphDatabase
-        driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+        driver = get_shared_driver()
         with driver.session() as session:
             result = session.run("MATCH (c:Company) RETURN count(c) AS n").single()
             company_count = result["n"]
             neo4j_status = "connected"
-        driver.close()
     except Exception as e:
         neo4j_status = "error"
         neo4j_error = str(e)
@@ -13,7 +13,28 @@ NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "investorlens")
 
+# Connection pool for the shared driver. Size it for peak concurrent sessions:
+# API worker threads × sessions per search (get_compare_data alone runs six
+# queries in parallel). Timeouts are in seconds.
+NEO4J_POOL_SIZE = int(os.getenv("NEO4J_POOL_SIZE", "50"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "30"))
+NEO4J_MAX_RETRY_TIME = float(os.getenv("NEO4J_MAX_RETRY_TIME", "15"))
+
+# Seconds full-scan listing queries (all companies, attribute rankings) stay cached
+GRAPH_CACHE_TTL = float(os.getenv("GRAPH_CACHE_TTL", "300"))
+# How often (seconds) a process re-reads the graph's load stamp; cached graph
+# results from before a reload are dropped within this interval
+GRAPH_VERSION_CHECK_INTERVAL = float(os.getenv("GRAPH_VERSION_CHECK_INTERVAL", "5"))
+
+# Seconds / entries for search()'s (query, persona) result cache
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "60"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+
 SEC_EDGAR_USER_AGENT = os.getenv("SEC_EDGAR_USER_AGENT", "InvestorLens dev@example.com")
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 COMPANIES_FILE = os.path.join(DATA_DIR, "companies.json")
+
+# Write enrichment checkpoints gzip-compressed alongside companies.json
+COMPRESSED_CHECKPOINTS = os.getenv("COMPRESSED_CHECKPOINTS", "false").lower() == "true"
+COMPANIES_CHECKPOINT_FILE = COMPANIES_FILE + ".gz"
@@ -5,16 +5,21 @@ and extract competitive relationships for the knowledge graph.
 
 Supports OpenAI (default) and Anthropic backends via --provider flag.
 """
+import gzip
 import json
 import sys
 import os
 import time
+from functools import lru_cache
 
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from config import COMPANIES_FILE, ANTHROPIC_API_KEY, OPENAI_API_KEY
+from config import (
+    COMPANIES_FILE, COMPANIES_CHECKPOINT_FILE, COMPRESSED_CHECKPOINTS,
+    ANTHROPIC_API_KEY, OPENAI_API_KEY,
+)
 
 # Valid relationship types for the knowledge graph
 RELATIONSHIP_TYPES = [
@@ -81,12 +86,16 @@ Provide your structured analysis.""")
 ])
 
 
+@lru_cache(maxsize=4)
+def _build_company_list_cached(triples: tuple[tuple[str, str, str], ...]) -> str:
+    """Format (company_id, name, sector) triples; cached so repeat calls are free."""
+    return "\n".join(f"  - {cid}: {name} ({sector})" for cid, name, sector in triples)
+
+
 def build_company_list(companies: list) -> str:
     """Build a formatted list of all companies for the prompt context."""
-    lines = []
-    for c in companies:
-        lines.append(f"  - {c['company_id']}: {c['name']} ({c['sector']})")
-    return "\n".join(lines)
+    triples = tuple((c["company_id"], c["name"], c["sector"]) for c in companies)
+    return _build_company_list_cached(triples)
 
 
 def enrich_company(llm, company: dict, company_list: str) -> dict:
@@ -142,10 +151,41 @@ def _get_llm(provider: str = "openai"):
         raise ValueError(f"Unknown provider: {provider}")
 
 
+def load_companies() -> dict:
+    """Load companies data, resuming from a newer compressed checkpoint if present."""
+    if (
+        os.path.exists(COMPANIES_CHECKPOINT_FILE)
+        and os.path.getmtime(COMPANIES_CHECKPOINT_FILE) > os.path.getmtime(COMPANIES_FILE)
+    ):
+        with gzip.open(COMPANIES_CHECKPOINT_FILE, "rt") as f:
+            return json.load(f)
+    with open(COMPANIES_FILE, "r") as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data: dict, compress: bool = False):
+    """Write JSON atomically (temp file + rename), optionally gzip-compressed."""
+    tmp_path = path + ".tmp"
+    if compress:
+        with gzip.open(tmp_path, "wt", compresslevel=3) as f:
+            json.dump(data, f, indent=2)
+    else:
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _save_checkpoint(data: dict):
+    """Persist an intermediate checkpoint (compressed when COMPRESSED_CHECKPOINTS is set)."""
+    if COMPRESSED_CHECKPOINTS:
+        _write_json(COMPANIES_CHECKPOINT_FILE, data, compress=True)
+    else:
+        _write_json(COMPANIES_FILE, data)
+
+
 def run(batch_size: int = 5, skip_existing: bool = True, provider: str = "openai"):
     """Run LLM enrichment for all companies."""
-    with open(COMPANIES_FILE, "r") as f:
-        data = json.load(f)
+    data = load_companies()
 
     companies = data["companies"]
     company_list = build_company_list(companies)
@@ -182,8 +222,7 @@ def run(batch_size: int = 5, skip_existing: bool = True, provider: str = "openai
 
             # Save after each batch
             if enriched_count % batch_size == 0:
-                with open(COMPANIES_FILE, "w") as f:
-                    json.dump(data, f, indent=2)
+                _save_checkpoint(data)
                 print(f"    [saved checkpoint — {enriched_count} enriched so far]")
 
         except Exception as e:
@@ -192,9 +231,10 @@ def run(batch_size: int = 5, skip_existing: bool = True, provider: str = "openai
         # Rate limiting
         time.sleep(1)
 
-    # Final save
-    with open(COMPANIES_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    # Final save — always plain JSON, since every other reader expects it
+    _write_json(COMPANIES_FILE, data)
+    if os.path.exists(COMPANIES_CHECKPOINT_FILE):
+        os.remove(COMPANIES_CHECKPOINT_FILE)
 
     print(f"\nDone. Enriched: {enriched_count}, Skipped: {skipped_count}, Total: {len(companies)}")
 
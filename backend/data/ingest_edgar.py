@@ -6,13 +6,14 @@ Uses the Company Facts API: https://data.sec.gov/api/xbrl/companyfacts/
 import json
 import sys
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import requests
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from config import COMPANIES_FILE, SEC_EDGAR_USER_AGENT
+from data.rate_limit import EDGAR_LIMITER
 
 # Mapping of tickers to SEC CIK numbers
 # CIK numbers are zero-padded to 10 digits for the API
@@ -30,6 +31,9 @@ TICKER_TO_CIK = {
 HEADERS = {"User-Agent": SEC_EDGAR_USER_AGENT}
 BASE_URL = "https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
 
+# Concurrent fetches; EDGAR_LIMITER keeps the combined rate within SEC's 10 req/s
+MAX_WORKERS = 4
+
 # XBRL taxonomy keys for the data we want
 FACTS_MAP = {
     "revenue": [
@@ -91,7 +95,8 @@ def fetch_edgar_data(ticker: str) -> dict:
         return {"error": f"No CIK mapping for {ticker}"}
 
     url = BASE_URL.format(cik=cik)
-    resp = requests.get(url, headers=HEADERS)
+    with EDGAR_LIMITER:
+        resp = requests.get(url, headers=HEADERS)
     resp.raise_for_status()
     facts = resp.json()
 
@@ -121,21 +126,24 @@ def run():
     print(f"Fetching SEC EDGAR data for {len(public_tickers)} companies...")
     print()
 
-    results = {}
-    for company_id, ticker in public_tickers.items():
+    def _fetch(ticker: str) -> dict:
         try:
-            print(f"  Fetching {ticker} ({company_id})...", end=" ")
-            edgar_data = fetch_edgar_data(ticker)
+            return fetch_edgar_data(ticker)
+        except Exception as e:
+            return {"data_source": "sec_edgar", "error": str(e)}
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        fetched = executor.map(_fetch, public_tickers.values())
+        for (company_id, ticker), edgar_data in zip(public_tickers.items(), fetched):
             results[company_id] = edgar_data
+            print(f"  Fetching {ticker} ({company_id})...", end=" ")
+            if "error" in edgar_data:
+                print(f"FAILED — {edgar_data['error']}")
+                continue
             rev = edgar_data.get("revenue_annual_b", "N/A")
             rd = edgar_data.get("rd_expense_annual_b", "N/A")
             print(f"OK — annual revenue: ${rev}B, R&D: ${rd}B")
-        except Exception as e:
-            print(f"FAILED — {e}")
-            results[company_id] = {"data_source": "sec_edgar", "error": str(e)}
-
-        # SEC rate limit: 10 requests/second
-        time.sleep(0.15)
 
     # Merge EDGAR data into companies.json alongside existing financials
     for company in data["companies"]:
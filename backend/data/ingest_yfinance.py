@@ -8,15 +8,13 @@ Falls back to seeded market data if Yahoo Finance rate-limits.
 import json
 import sys
 import os
-import time
 from datetime import datetime
 
 import yfinance as yf
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from config import COMPANIES_FILE
-
-REQUEST_DELAY = 3  # seconds between tickers
+from data.rate_limit import YFINANCE_LIMITER
 
 # Fallback market data (approximate values, refreshable via API when available)
 # Sources: public market data as of early 2026
@@ -86,8 +84,9 @@ def safe_get(val, divisor=1.0):
 def fetch_financials_live(ticker: str) -> dict | None:
     """Attempt live fetch from Yahoo Finance. Returns None if blocked."""
     try:
-        stock = yf.Ticker(ticker)
-        fi = stock.fast_info
+        with YFINANCE_LIMITER:
+            stock = yf.Ticker(ticker)
+            fi = stock.fast_info
         mcap = safe_get(fi.get("marketCap", None), 1e9)
         if mcap is None:
             return None
@@ -159,8 +158,6 @@ def run():
         else:
             print("SKIPPED — no data")
 
-        time.sleep(REQUEST_DELAY)
-
     with open(COMPANIES_FILE, "w") as f:
         json.dump(data, f, indent=2)
 
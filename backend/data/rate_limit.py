@@ -0,0 +1,47 @@
+"""
+Shared token-bucket rate limiter for the ingest scripts.
+
+Unlike a fixed sleep after every request, a bucket only blocks when the
+request budget is actually exhausted, and it is thread-safe so concurrent
+workers can share one budget.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """Allow up to `rate` acquisitions per `period` seconds (burst = `rate`)."""
+
+    def __init__(self, rate: float, period: float = 1.0):
+        self.capacity = rate
+        self.fill_rate = rate / period
+        self._tokens = rate
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.fill_rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.fill_rate
+            time.sleep(wait)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+# SEC fair-access policy: max 10 requests/second
+EDGAR_LIMITER = TokenBucket(10, 1.0)
+
+# Yahoo Finance rate-limits aggressively from local envs: 1 request per 3s
+YFINANCE_LIMITER = TokenBucket(1, 3.0)
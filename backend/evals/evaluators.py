@@ -8,17 +8,33 @@ LLM-as-judge (require OpenAI):
 
 Deterministic (no LLM, fast):
   - graph_loaded           graph_data has non-empty nodes and edges
-  - results_populated      results list is non-empty; every item has name,
+  - structural_checks      one pass over results, reporting three keys:
+      results_populated    results list is non-empty; every item has name,
                            composite_score, and score_breakdown
-  - score_in_range         all composite_score values are 0 ≤ x ≤ 1
-  - rationale_present      every result has ≥ 2 score_breakdown factors with
+      score_in_range       all composite_score values are 0 ≤ x ≤ 1
+      rationale_present    every result has ≥ 2 score_breakdown factors with
                            non-zero contribution values
   - expected_companies_in_results
                            at least one reference expected_company appears in
                            the top-5 ranked results (by company_id)
 
-All evaluators return {"key": str, "score": 0|1, "comment": str}.
+Feedback dicts are {"key": str, "score": 0|1, "comment": str}; a judge whose
+OpenAI call failed reports score None with the error as the comment. The
+composite evaluators — structural_checks() and llm_judges(), which sends the
+three judges concurrently — return {"results": [...]} with one feedback dict
+per key.
+
+batch_deterministic() runs the deterministic set over a whole dataset locally,
+without LangSmith (run_evals.py --local).
 """
+import hashlib
+import json
+import os
+import tempfile
+from collections import defaultdict
+from functools import cache
+
+from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 
@@ -30,7 +46,74 @@ class _JudgeScore(BaseModel):
     reasoning: str = Field(description="One-sentence explanation of the score")
 
 
-_judge = ChatOpenAI(model="gpt-4o-mini", temperature=0).with_structured_output(_JudgeScore)
+_JUDGE_MODEL = "gpt-4o-mini"
+
+
+@cache
+def _get_judge():
+    """Build the judge on first use, so deterministic-only runs never construct a ChatOpenAI."""
+    return ChatOpenAI(model=_JUDGE_MODEL, temperature=0).with_structured_output(_JudgeScore)
+
+
+# ── Judge response cache ─────────────────────────────────────────────────────
+# Exact-match, disk-backed: identical (model, messages) requests across runs
+# reuse the stored verdict instead of calling OpenAI again. Disable with
+# set_judge_cache(False) (run_evals.py --no-cache) for calibration runs.
+# One JSON file per verdict, written atomically, so concurrent eval processes
+# can share the directory; unreadable entries count as misses.
+
+_JUDGE_CACHE_DIR = os.path.join(os.path.dirname(__file__), ".judge_cache")
+_judge_cache_enabled = True
+
+
+def set_judge_cache(enabled: bool):
+    """Enable or disable the on-disk judge cache."""
+    global _judge_cache_enabled
+    _judge_cache_enabled = enabled
+
+
+def _cache_key(messages: list) -> str:
+    raw = "\x00".join([_JUDGE_MODEL] + [f"{m.type}:{m.content}" for m in messages])
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _cache_read(key: str) -> _JudgeScore | None:
+    try:
+        with open(os.path.join(_JUDGE_CACHE_DIR, key + ".json"), encoding="utf-8") as f:
+            return _JudgeScore.model_validate(json.load(f))
+    except (OSError, ValueError):
+        return None
+
+
+def _cache_write(key: str, verdict: _JudgeScore):
+    os.makedirs(_JUDGE_CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=_JUDGE_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(verdict.model_dump(), f)
+    os.replace(tmp, os.path.join(_JUDGE_CACHE_DIR, key + ".json"))
+
+
+def _judge_batch(requests: list[list]) -> list[_JudgeScore | Exception]:
+    """Judge several message lists concurrently, serving repeats from the cache.
+
+    A failed call (rate limit, unparseable structured output) comes back as its
+    exception in that slot, so the other verdicts survive; failures aren't cached.
+    """
+    if not _judge_cache_enabled:
+        return _get_judge().batch(requests, return_exceptions=True)
+
+    keys = [_cache_key(messages) for messages in requests]
+    verdicts = [_cache_read(k) for k in keys]
+
+    misses = [i for i, verdict in enumerate(verdicts) if verdict is None]
+    if misses:
+        fresh = _get_judge().batch([requests[i] for i in misses], return_exceptions=True)
+        for i, verdict in zip(misses, fresh):
+            verdicts[i] = verdict
+            if not isinstance(verdict, Exception):
+                _cache_write(keys[i], verdict)
+
+    return verdicts
 
 
 def _fmt_results(results: list) -> str:
@@ -54,42 +137,77 @@ _PERSONA_FOCUS = {
 
 
 # ── LLM-as-judge evaluators ──────────────────────────────────────────────────
-
-def hallucination_free(inputs: dict, outputs: dict, reference_outputs: dict) -> dict:
-    """
-    Score 1 if the NL explanation is fully grounded in the structured results.
-    Score 0 if it mentions companies, metrics, or claims not present in results.
-    """
+#
+# Each judge is split into a message builder and the judge call. A builder
+# returns either the judge messages, or a finished feedback dict when there is
+# nothing to judge. That lets llm_judges() send all three prompts concurrently.
+# Rows the runner tagged with outputs["_skip_llm"] (no explanation or no
+# results) never reach the judge.
+
+# System prompts are built once at import. They lead every message list so the
+# invariant prefix is eligible for OpenAI's automatic prompt caching.
+_HALLUCINATION_SYS = SystemMessage(content=(
+    "You are an expert evaluator checking AI-generated text for hallucinations. "
+    "Hallucination = any claim about a specific company, metric, or relationship "
+    "NOT supported by the structured data provided."
+))
+
+_RELEVANCE_SYS = SystemMessage(content=(
+    "You are an expert evaluator assessing whether an AI response is relevant "
+    "to the user's question. Score 1 = directly addresses the question, "
+    "0 = off-topic or does not answer what was asked."
+))
+
+_PERSONA_SYS = SystemMessage(content=(
+    "You are an expert evaluator checking whether an investment analysis is "
+    "written from the correct investor persona's perspective."
+))
+
+
+def _verdict_feedback(key: str, result) -> dict:
+    """Feedback for one judge verdict; a failed call scores None with the error as comment."""
+    if isinstance(result, Exception):
+        return {"key": key, "score": None, "comment": f"judge error: {type(result).__name__}: {result}"}
+    return {"key": key, "score": result.score, "comment": result.reasoning}
+
+
+def _judge_feedback(key: str, prepared) -> dict:
+    """Run a single prepared judge request (or pass a short-circuit result through)."""
+    if isinstance(prepared, dict):
+        return prepared
+    return _verdict_feedback(key, _judge_batch([prepared])[0])
+
+
+def _skipped(key: str) -> dict:
+    """Feedback for rows the runner flagged as having nothing worth judging."""
+    return {"key": key, "score": 0, "comment": "skipped: no content"}
+
+
+def _hallucination_messages(inputs: dict, outputs: dict):
+    if outputs.get("_skip_llm"):
+        return _skipped("hallucination_free")
     explanation = outputs.get("explanation") or ""
     if not explanation.strip():
         return {"key": "hallucination_free", "score": 1,
                 "comment": "No explanation generated — nothing to hallucinate."}
 
-    structured = _fmt_results(outputs.get("results", []))
-
-    result = _judge.invoke([
-        ("system",
-         "You are an expert evaluator checking AI-generated text for hallucinations. "
-         "Hallucination = any claim about a specific company, metric, or relationship "
-         "NOT supported by the structured data provided."),
-        ("human",
-         f"STRUCTURED DATA (ground truth):\n{structured}\n\n"
-         f"AI EXPLANATION:\n{explanation}\n\n"
-         "Does the explanation contain ONLY information supported by the structured data? "
-         "Score 1 = fully grounded, 0 = contains hallucination."),
-    ])
-    return {
-        "key": "hallucination_free",
-        "score": result.score,
-        "comment": result.reasoning,
-    }
+    # target() pre-renders this once per example; fall back for direct callers
+    structured = outputs.get("_structured_text") or _fmt_results(outputs.get("results", []))
+
+    return [
+        _HALLUCINATION_SYS,
+        HumanMessage(content=(
+            f"STRUCTURED DATA (ground truth):\n{structured}\n\n"
+            f"AI EXPLANATION:\n{explanation}\n\n"
+            "Does the explanation contain ONLY information supported by the structured data? "
+            "Score 1 = fully grounded, 0 = contains hallucination."
+        )),
+    ]
 
 
-def answer_relevance(inputs: dict, outputs: dict, reference_outputs: dict) -> dict:
-    """
-    Score 1 if the explanation directly answers the user's query.
-    Score 0 if it is off-topic or fails to address the question asked.
-    """
+def _relevance_messages(inputs: dict, outputs: dict):
+    if outputs.get("_skip_llm"):
+        return _skipped("answer_relevance")
     explanation = outputs.get("explanation") or ""
     if not explanation.strip():
         return {"key": "answer_relevance", "score": 0,
@@ -97,28 +215,19 @@ def answer_relevance(inputs: dict, outputs: dict, reference_outputs: dict) -> di
 
     query = inputs.get("query", "")
 
-    result = _judge.invoke([
-        ("system",
-         "You are an expert evaluator assessing whether an AI response is relevant "
-         "to the user's question. Score 1 = directly addresses the question, "
-         "0 = off-topic or does not answer what was asked."),
-        ("human",
-         f"USER QUERY: {query}\n\n"
-         f"AI RESPONSE:\n{explanation}\n\n"
-         "Does the response directly answer the query? Score 1 = yes, 0 = no."),
-    ])
-    return {
-        "key": "answer_relevance",
-        "score": result.score,
-        "comment": result.reasoning,
-    }
+    return [
+        _RELEVANCE_SYS,
+        HumanMessage(content=(
+            f"USER QUERY: {query}\n\n"
+            f"AI RESPONSE:\n{explanation}\n\n"
+            "Does the response directly answer the query? Score 1 = yes, 0 = no."
+        )),
+    ]
 
 
-def persona_alignment(inputs: dict, outputs: dict, reference_outputs: dict) -> dict:
-    """
-    Score 1 if the explanation frames findings using the active persona's priorities.
-    Score 0 if it ignores persona framing (e.g. a VC explanation that only talks about moats).
-    """
+def _persona_messages(inputs: dict, outputs: dict):
+    if outputs.get("_skip_llm"):
+        return _skipped("persona_alignment")
     explanation = outputs.get("explanation") or ""
     if not explanation.strip():
         return {"key": "persona_alignment", "score": 0,
@@ -127,22 +236,71 @@ def persona_alignment(inputs: dict, outputs: dict, reference_outputs: dict) -> d
     persona = inputs.get("persona", "value_investor")
     focus = _PERSONA_FOCUS.get(persona, "relevant investment criteria")
 
-    result = _judge.invoke([
-        ("system",
-         "You are an expert evaluator checking whether an investment analysis is "
-         "written from the correct investor persona's perspective."),
-        ("human",
-         f"INVESTOR PERSONA: {persona.replace('_', ' ').title()}\n"
-         f"THIS PERSONA FOCUSES ON: {focus}\n\n"
-         f"EXPLANATION:\n{explanation}\n\n"
-         "Does the explanation frame its findings through this persona's priorities? "
-         "Score 1 = yes, clearly aligned, 0 = ignores persona framing."),
-    ])
-    return {
-        "key": "persona_alignment",
-        "score": result.score,
-        "comment": result.reasoning,
-    }
+    return [
+        _PERSONA_SYS,
+        HumanMessage(content=(
+            f"INVESTOR PERSONA: {persona.replace('_', ' ').title()}\n"
+            f"THIS PERSONA FOCUSES ON: {focus}\n\n"
+            f"EXPLANATION:\n{explanation}\n\n"
+            "Does the explanation frame its findings through this persona's priorities? "
+            "Score 1 = yes, clearly aligned, 0 = ignores persona framing."
+        )),
+    ]
+
+
+def hallucination_free(inputs: dict, outputs: dict, reference_outputs: dict) -> dict:
+    """
+    Score 1 if the NL explanation is fully grounded in the structured results.
+    Score 0 if it mentions companies, metrics, or claims not present in results.
+    """
+    return _judge_feedback("hallucination_free", _hallucination_messages(inputs, outputs))
+
+
+def answer_relevance(inputs: dict, outputs: dict, reference_outputs: dict) -> dict:
+    """
+    Score 1 if the explanation directly answers the user's query.
+    Score 0 if it is off-topic or fails to address the question asked.
+    """
+    return _judge_feedback("answer_relevance", _relevance_messages(inputs, outputs))
+
+
+def persona_alignment(inputs: dict, outputs: dict, reference_outputs: dict) -> dict:
+    """
+    Score 1 if the explanation frames findings using the active persona's priorities.
+    Score 0 if it ignores persona framing (e.g. a VC explanation that only talks about moats).
+    """
+    return _judge_feedback("persona_alignment", _persona_messages(inputs, outputs))
+
+
+_LLM_JUDGES = (
+    ("hallucination_free", _hallucination_messages),
+    ("answer_relevance", _relevance_messages),
+    ("persona_alignment", _persona_messages),
+)
+
+
+def llm_judges(inputs: dict, outputs: dict, reference_outputs: dict) -> dict:
+    """
+    Run hallucination_free, answer_relevance and persona_alignment in one pass.
+    Uncached judge requests are sent concurrently via Runnable.batch, so per-example
+    judge latency is the slowest call rather than the sum of all three.
+    Returns {"results": [feedback, ...]} in _LLM_JUDGES order.
+    """
+    feedback: dict[str, dict] = {}
+    pending = []
+    for key, build in _LLM_JUDGES:
+        prepared = build(inputs, outputs)
+        if isinstance(prepared, dict):
+            feedback[key] = prepared
+        else:
+            pending.append((key, prepared))
+
+    if pending:
+        scores = _judge_batch([messages for _, messages in pending])
+        for (key, _), result in zip(pending, scores):
+            feedback[key] = _verdict_feedback(key, result)
+
+    return {"results": [feedback[key] for key, _ in _LLM_JUDGES]}
 
 
 # ── Deterministic evaluators ─────────────────────────────────────────────────
@@ -165,80 +323,75 @@ def graph_loaded(inputs: dict, outputs: dict, reference_outputs: dict) -> dict:
             "comment": f"graph_data missing: {', '.join(missing)}."}
 
 
-def results_populated(inputs: dict, outputs: dict, reference_outputs: dict) -> dict:
+def structural_checks(inputs: dict, outputs: dict, reference_outputs: dict) -> dict:
     """
-    Score 1 if:
-      - results list is non-empty
-      - every result has: name, composite_score, score_breakdown (non-empty dict)
+    Walk the results list once and emit three feedback entries:
+      results_populated   results non-empty (≥ min_results); every item has
+                          name, composite_score, score_breakdown (non-empty dict)
+      score_in_range      every composite_score is within [0, 1]
+      rationale_present   every result has ≥ 2 score_breakdown factors with a
+                          non-zero value (rationale, not just zeroed-out scores)
+    Returns {"results": [feedback, feedback, feedback]}.
     """
     results = outputs.get("results") or []
-    min_expected = reference_outputs.get("min_results", 1)
-
     if not results:
-        return {"key": "results_populated", "score": 0,
-                "comment": "results list is empty."}
+        return {"results": [
+            {"key": "results_populated", "score": 0,
+             "comment": "results list is empty."},
+            {"key": "score_in_range", "score": 0,
+             "comment": "No results to validate scores against."},
+            {"key": "rationale_present", "score": 0,
+             "comment": "No results to validate rationale against."},
+        ]}
 
+    min_expected = reference_outputs.get("min_results", 1)
+    populated_error = None
     if len(results) < min_expected:
-        return {"key": "results_populated", "score": 0,
-                "comment": f"Expected ≥{min_expected} results, got {len(results)}."}
+        populated_error = f"Expected ≥{min_expected} results, got {len(results)}."
 
+    out_of_range = []
+    thin_rationale = []
     for r in results:
-        if not r.get("name"):
-            return {"key": "results_populated", "score": 0,
-                    "comment": f"Result rank {r.get('rank')} is missing a name."}
-        if r.get("composite_score") is None:
-            return {"key": "results_populated", "score": 0,
-                    "comment": f"{r.get('name')} is missing composite_score."}
-        if not r.get("score_breakdown"):
-            return {"key": "results_populated", "score": 0,
-                    "comment": f"{r.get('name')} has no score_breakdown."}
-
-    return {"key": "results_populated", "score": 1,
-            "comment": f"{len(results)} results, all fully populated."}
-
-
-def score_in_range(inputs: dict, outputs: dict, reference_outputs: dict) -> dict:
-    """Score 1 if every composite_score is within [0, 1]."""
-    results = outputs.get("results") or []
-    if not results:
-        return {"key": "score_in_range", "score": 0,
-                "comment": "No results to validate scores against."}
-
-    out_of_range = [
-        f"{r.get('name')} ({r.get('composite_score')})"
-        for r in results
-        if r.get("composite_score") is not None
-        and not (0.0 <= r["composite_score"] <= 1.0)
-    ]
-    if out_of_range:
-        return {"key": "score_in_range", "score": 0,
-                "comment": f"Out-of-range scores: {', '.join(out_of_range)}."}
-    return {"key": "score_in_range", "score": 1,
-            "comment": "All composite scores are within [0, 1]."}
-
+        name = r.get("name")
+        score = r.get("composite_score")
+        bd = r.get("score_breakdown")
+
+        if populated_error is None:
+            if not name:
+                populated_error = f"Result rank {r.get('rank')} is missing a name."
+            elif score is None:
+                populated_error = f"{name} is missing composite_score."
+            elif not bd:
+                populated_error = f"{name} has no score_breakdown."
+
+        if score is not None and not (0.0 <= score <= 1.0):
+            out_of_range.append(f"{name} ({score})")
+
+        nonzero = sum(1 for v in (bd or {}).values() if isinstance(v, (int, float)) and v > 0)
+        if nonzero < 2:
+            thin_rationale.append(f"{name} (only {nonzero} non-zero factors)")
+
+    if populated_error:
+        populated = {"key": "results_populated", "score": 0, "comment": populated_error}
+    else:
+        populated = {"key": "results_populated", "score": 1,
+                     "comment": f"{len(results)} results, all fully populated."}
 
-def rationale_present(inputs: dict, outputs: dict, reference_outputs: dict) -> dict:
-    """
-    Score 1 if every result has ≥ 2 score_breakdown factors with a non-zero value.
-    This confirms the ranking engine populated rationale, not just zeroed-out scores.
-    """
-    results = outputs.get("results") or []
-    if not results:
-        return {"key": "rationale_present", "score": 0,
-                "comment": "No results to validate rationale against."}
+    if out_of_range:
+        in_range = {"key": "score_in_range", "score": 0,
+                    "comment": f"Out-of-range scores: {', '.join(out_of_range)}."}
+    else:
+        in_range = {"key": "score_in_range", "score": 1,
+                    "comment": "All composite scores are within [0, 1]."}
 
-    failures = []
-    for r in results:
-        bd = r.get("score_breakdown") or {}
-        nonzero = [k for k, v in bd.items() if isinstance(v, (int, float)) and v > 0]
-        if len(nonzero) < 2:
-            failures.append(f"{r.get('name')} (only {len(nonzero)} non-zero factors)")
+    if thin_rationale:
+        rationale = {"key": "rationale_present", "score": 0,
+                     "comment": f"Thin rationale: {'; '.join(thin_rationale)}."}
+    else:
+        rationale = {"key": "rationale_present", "score": 1,
+                     "comment": "All results have ≥ 2 non-zero score factors."}
 
-    if failures:
-        return {"key": "rationale_present", "score": 0,
-                "comment": f"Thin rationale: {'; '.join(failures)}."}
-    return {"key": "rationale_present", "score": 1,
-            "comment": "All results have ≥ 2 non-zero score factors."}
+    return {"results": [populated, in_range, rationale]}
 
 
 def expected_companies_in_results(inputs: dict, outputs: dict, reference_outputs: dict) -> dict:
@@ -254,7 +407,8 @@ def expected_companies_in_results(inputs: dict, outputs: dict, reference_outputs
     results = outputs.get("results") or []
     top5_ids = {r.get("company_id", "").lower() for r in results[:5]}
 
-    matched = [c for c in expected if c.lower() in top5_ids]
+    expected_lower = {c.lower(): c for c in expected}
+    matched = sorted(expected_lower[k] for k in expected_lower.keys() & top5_ids)
     if matched:
         return {"key": "expected_companies_in_results", "score": 1,
                 "comment": f"Found in top 5: {', '.join(matched)}."}
@@ -267,18 +421,31 @@ def expected_companies_in_results(inputs: dict, outputs: dict, reference_outputs
 
 # ── Evaluator lists for the runner ───────────────────────────────────────────
 
+# The three judges run together in llm_judges so their API calls overlap
 LLM_EVALUATORS = [
-    hallucination_free,
-    answer_relevance,
-    persona_alignment,
+    llm_judges,
 ]
 
 DETERMINISTIC_EVALUATORS = [
     graph_loaded,
-    results_populated,
-    score_in_range,
-    rationale_present,
+    structural_checks,
     expected_companies_in_results,
 ]
 
 ALL_EVALUATORS = DETERMINISTIC_EVALUATORS + LLM_EVALUATORS
+
+
+def batch_deterministic(examples: list[tuple[dict, dict, dict]]) -> dict[str, list[dict]]:
+    """
+    Run DETERMINISTIC_EVALUATORS over a whole dataset in one local pass,
+    bypassing LangSmith's per-example evaluator round-trips.
+    `examples` holds (inputs, outputs, reference_outputs) triples.
+    Returns {key: [feedback, ...]} with one entry per example, in example order.
+    """
+    feedback: dict[str, list[dict]] = defaultdict(list)
+    for inputs, outputs, reference_outputs in examples:
+        for evaluator in DETERMINISTIC_EVALUATORS:
+            fb = evaluator(inputs, outputs, reference_outputs)
+            for item in fb.get("results", (fb,)):
+                feedback[item["key"]].append(item)
+    return dict(feedback)
@@ -8,6 +8,13 @@ Usage:
   # Deterministic only — no OpenAI calls, fast structural check:
   python backend/evals/run_evals.py --no-llm
 
+  # Deterministic only, scored locally in one batch — no LangSmith key or upload
+  # (the agent itself still calls OpenAI, so OPENAI_API_KEY is required):
+  python backend/evals/run_evals.py --local
+
+  # Bypass the on-disk judge cache (fresh OpenAI verdicts, e.g. for calibration):
+  python backend/evals/run_evals.py --no-cache
+
   # Re-create the LangSmith dataset (needed only once, or after changes):
   python backend/evals/run_evals.py --create-dataset
 
@@ -17,6 +24,7 @@ View them at: https://smith.langchain.com
 import sys
 import os
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 # Allow imports from backend/ root
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -24,15 +32,22 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from langsmith import Client, evaluate
 from config import LANGSMITH_API_KEY, OPENAI_API_KEY
 from agents.graph import run_agent
-from evals.dataset import create_or_load_dataset, DATASET_NAME
-from evals.evaluators import ALL_EVALUATORS, DETERMINISTIC_EVALUATORS
+from evals.dataset import create_or_load_dataset, DATASET_NAME, EVAL_EXAMPLES
+from evals.evaluators import (
+    ALL_EVALUATORS, DETERMINISTIC_EVALUATORS, batch_deterministic, set_judge_cache, _fmt_results,
+)
+
+
+# Examples evaluated in parallel (run_agent + judges are I/O-bound)
+MAX_CONCURRENCY = min(8, len(EVAL_EXAMPLES))
 
 
 # ── Validation ────────────────────────────────────────────────────────────────
 
-def _check_env():
+def _check_env(local: bool = False):
+    # --local skips LangSmith, but run_agent's data-gathering step still calls OpenAI
     missing = []
-    if not LANGSMITH_API_KEY:
+    if not local and not LANGSMITH_API_KEY:
         missing.append("LANGSMITH_API_KEY")
     if not OPENAI_API_KEY:
         missing.append("OPENAI_API_KEY")
@@ -48,19 +63,67 @@ def target(inputs: dict) -> dict:
     """
     Wraps run_agent() for LangSmith evaluate().
     Always fetches the explanation so LLM judges have content to evaluate.
+    Rows with no explanation or no results are tagged _skip_llm so the judges
+    don't spend API calls on them. The judge's structured-data block is
+    rendered once here and reused by every evaluator.
     """
-    return run_agent(
+    outputs = run_agent(
         query=inputs["query"],
         persona=inputs.get("persona", "value_investor"),
         include_explanation=True,
         all_personas=False,
     )
+    outputs["_skip_llm"] = not (outputs.get("explanation") and outputs.get("results"))
+    outputs["_structured_text"] = _fmt_results(outputs.get("results", []))
+    return outputs
+
+
+def _local_target(inputs: dict) -> dict:
+    """run_agent() without the explanation — deterministic evaluators don't read it."""
+    return run_agent(
+        query=inputs["query"],
+        persona=inputs.get("persona", "value_investor"),
+        include_explanation=False,
+        all_personas=False,
+    )
 
 
 # ── Runner ────────────────────────────────────────────────────────────────────
 
-def run(no_llm: bool = False, create_dataset: bool = False):
-    _check_env()
+def _print_summary(scores: dict[str, list[int]]):
+    print(f"{'Evaluator':<35} {'Pass':>5} {'Fail':>5} {'Pass%':>7}")
+    print("-" * 52)
+    for key, vals in sorted(scores.items()):
+        passed = sum(vals)
+        failed = len(vals) - passed
+        pct = 100 * passed / len(vals) if vals else 0
+        print(f"{key:<35} {passed:>5} {failed:>5} {pct:>6.0f}%")
+
+
+def run_local():
+    """Score EVAL_EXAMPLES with the deterministic evaluators in one local batch."""
+    print("\nRunning InvestorLens evals — mode: local deterministic (no LangSmith upload)")
+    print(f"Examples: {len(EVAL_EXAMPLES)}\n")
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as pool:
+        outputs = list(pool.map(_local_target, (ex["inputs"] for ex in EVAL_EXAMPLES)))
+
+    feedback = batch_deterministic([
+        (ex["inputs"], out, ex["reference_outputs"])
+        for ex, out in zip(EVAL_EXAMPLES, outputs)
+    ])
+
+    print("\n── Results ──────────────────────────────────────────────────────")
+    _print_summary({key: [int(fb["score"] or 0) for fb in fbs] for key, fbs in feedback.items()})
+
+
+def run(no_llm: bool = False, create_dataset: bool = False, no_cache: bool = False,
+        local: bool = False):
+    _check_env(local)
+    if local:
+        run_local()
+        return
+    set_judge_cache(not no_cache)
 
     client = Client(api_key=LANGSMITH_API_KEY)
 
@@ -78,8 +141,10 @@ def run(no_llm: bool = False, create_dataset: bool = False):
         data=DATASET_NAME,
         evaluators=evaluators,
         experiment_prefix="investorlens",
-        # Keep concurrency at 1 — Neo4j driver is not thread-safe across examples
-        max_concurrency=1,
+        # The Neo4j Driver is thread-safe; Sessions are not. The data layer opens a
+        # session per query and never shares one across calls, so only the driver
+        # crosses threads and examples can run concurrently.
+        max_concurrency=MAX_CONCURRENCY,
     )
 
     # Print a summary table
@@ -93,13 +158,7 @@ def run(no_llm: bool = False, create_dataset: bool = False):
     if not scores:
         print("No scores returned — check LangSmith UI for details.")
     else:
-        print(f"{'Evaluator':<35} {'Pass':>5} {'Fail':>5} {'Pass%':>7}")
-        print("-" * 52)
-        for key, vals in sorted(scores.items()):
-            passed = sum(vals)
-            failed = len(vals) - passed
-            pct = 100 * passed / len(vals) if vals else 0
-            print(f"{key:<35} {passed:>5} {failed:>5} {pct:>6.0f}%")
+        _print_summary(scores)
 
     print("\nFull results uploaded to LangSmith.")
     print("View at: https://smith.langchain.com")
@@ -119,5 +178,17 @@ if __name__ == "__main__":
         action="store_true",
         help="Create (or verify) the LangSmith dataset before running evals",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached LLM-judge verdicts and call OpenAI for every judgement",
+    )
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Deterministic evaluators only, scored locally without LangSmith "
+             "(the agent still needs OPENAI_API_KEY)",
+    )
     args = parser.parse_args()
-    run(no_llm=args.no_llm, create_dataset=args.create_dataset)
+    run(no_llm=args.no_llm, create_dataset=args.create_dataset, no_cache=args.no_cache,
+        local=args.local)
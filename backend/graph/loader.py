@@ -5,10 +5,13 @@ Reads enriched companies.json and loads everything into Neo4j:
   - Segment nodes + TARGETS_SAME_SEGMENT edges
   - InvestmentTheme nodes + SHARES_INVESTMENT_THEME edges
   - Inter-company relationship edges from LLM enrichment
+  - A GraphMeta node stamped with the load time (cache invalidation)
 """
 import json
 import sys
 import os
+from collections import defaultdict
+from itertools import islice
 
 from neo4j import GraphDatabase
 
@@ -28,225 +31,248 @@ SEGMENT_NAMES = {
 }
 
 # Relationship types that are bidirectional (create both directions)
-BIDIRECTIONAL = {"COMPETES_WITH", "PARTNERS_WITH", "SIMILAR_FINANCIAL_PROFILE", "SHARES_INVESTMENT_THEME"}
+BIDIRECTIONAL = frozenset({"COMPETES_WITH", "PARTNERS_WITH", "SIMILAR_FINANCIAL_PROFILE", "SHARES_INVESTMENT_THEME"})
 
+# Company-to-company relationship types loaded from LLM enrichment.
+# TARGETS_SAME_SEGMENT / SHARES_INVESTMENT_THEME go through Segment/Theme nodes instead.
+RELATIONSHIP_TYPES = ("COMPETES_WITH", "DISRUPTS", "PARTNERS_WITH",
+                      "SIMILAR_FINANCIAL_PROFILE", "ACQUIRED", "SUPPLIES_TO")
+# Set form for the per-edge membership check; the tuple keeps write order stable
+_KNOWN_TYPES = frozenset(RELATIONSHIP_TYPES)
 
-def run_schema(driver):
-    """Execute schema.cypher to create constraints and indexes."""
-    with open(SCHEMA_FILE, "r") as f:
-        schema_text = f.read()
 
-    statements = [s.strip() for s in schema_text.split(";") if s.strip() and not s.strip().startswith("//")]
+def _schema_statements(schema_text: str) -> list[str]:
+    """Split schema.cypher into statements, dropping `//` comment lines."""
+    statements = []
+    for chunk in schema_text.split(";"):
+        lines = [line for line in chunk.splitlines() if not line.strip().startswith("//")]
+        stmt = "\n".join(lines).strip()
+        if stmt:
+            statements.append(stmt)
+    return statements
 
-    with driver.session() as session:
+
+def run_schema(session):
+    """Execute schema.cypher to create constraints and indexes.
+
+    Every statement uses IF NOT EXISTS, so re-running is a no-op and any
+    error is a real one — it propagates instead of being swallowed.
+    """
+    with open(SCHEMA_FILE, "r") as f:
+        statements = _schema_statements(f.read())
+
+    def _write(tx):
         for stmt in statements:
-            try:
-                session.run(stmt)
-            except Exception as e:
-                if "already exists" in str(e).lower() or "equivalent" in str(e).lower():
-                    pass
-                else:
-                    print(f"  Schema warning: {e}")
+            tx.run(stmt).consume()
 
-    print("Schema constraints and indexes created.")
+    session.execute_write(_write)
 
+    print(f"Schema constraints and indexes created ({len(statements)} statements).")
 
-def clear_graph(driver):
-    """Remove all existing nodes and relationships."""
-    with driver.session() as session:
-        session.run("MATCH (n) DETACH DELETE n")
+
+# Rows per UNWIND write transaction — bounds transaction state as the corpus grows
+BATCH_SIZE = 500
+
+# Nodes deleted per inner transaction when clearing the graph
+CLEAR_BATCH_SIZE = 10000
+
+
+def clear_graph(session):
+    """Remove all existing nodes and relationships in bounded batches.
+
+    CALL { } IN TRANSACTIONS only works in an auto-commit transaction, so this
+    goes through session.run rather than execute_write.
+    """
+    session.run(
+        f"""
+        MATCH (n)
+        CALL {{ WITH n DETACH DELETE n }} IN TRANSACTIONS OF {CLEAR_BATCH_SIZE} ROWS
+        """
+    ).consume()
     print("Cleared existing graph data.")
 
 
-def load_companies(driver, companies: list):
-    """Create Company nodes with all attributes."""
+def _batched(rows, size: int = BATCH_SIZE):
+    """Yield lists of up to `size` rows from any iterable."""
+    it = iter(rows)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def _write_batched(session, query: str, rows) -> None:
+    """Run an `UNWIND $rows` write query once per BATCH_SIZE chunk of rows."""
+    for batch in _batched(rows):
+        session.execute_write(lambda tx, b=batch: tx.run(query, rows=b).consume())
+
+
+def _company_props(c: dict) -> dict:
+    """Flatten one company record into the Company node property map."""
+    fin = c.get("financials", {})
+    growth = c.get("growth_signals", {})
+    llm = c.get("llm_enriched", {})
+    return {
+        "name": c["name"],
+        "ticker": c.get("ticker"),
+        "status": c["status"],
+        "sector": c["sector"],
+        "description": c.get("description", ""),
+        "founded_year": c.get("founded_year"),
+        "hq": c.get("hq"),
+        # Financials
+        "market_cap_b": fin.get("market_cap_b"),
+        "revenue_ttm_b": fin.get("revenue_ttm_b"),
+        "gross_margin": fin.get("gross_margin"),
+        "operating_margin": fin.get("operating_margin"),
+        "ebitda_b": fin.get("ebitda_b"),
+        "free_cash_flow_b": fin.get("free_cash_flow_b"),
+        "debt_to_equity": fin.get("debt_to_equity"),
+        "pe_ratio": fin.get("pe_ratio"),
+        "price_to_sales": fin.get("price_to_sales"),
+        # Growth signals
+        "employee_count_est": growth.get("employee_count_est"),
+        "github_stars": growth.get("github_stars"),
+        # LLM enriched
+        "moat_durability": llm.get("moat_durability"),
+        "moat_reasoning": llm.get("moat_reasoning"),
+        "enterprise_readiness_score": llm.get("enterprise_readiness_score"),
+        "operational_improvement_potential": llm.get("operational_improvement_potential"),
+        "financial_profile_cluster": llm.get("financial_profile_cluster"),
+        "developer_adoption_score": llm.get("developer_adoption_score"),
+        "product_maturity_score": llm.get("product_maturity_score"),
+        "customer_switching_cost": llm.get("customer_switching_cost"),
+        "revenue_predictability": llm.get("revenue_predictability"),
+        "market_timing_score": llm.get("market_timing_score"),
+    }
+
+
+def load_companies(session, companies: list):
+    """Create Company nodes with all attributes in UNWIND batches."""
     query = """
-    MERGE (c:Company {company_id: $company_id})
-    SET c.name = $name,
-        c.ticker = $ticker,
-        c.status = $status,
-        c.sector = $sector,
-        c.description = $description,
-        c.founded_year = $founded_year,
-        c.hq = $hq,
-        c.market_cap_b = $market_cap_b,
-        c.revenue_ttm_b = $revenue_ttm_b,
-        c.gross_margin = $gross_margin,
-        c.operating_margin = $operating_margin,
-        c.ebitda_b = $ebitda_b,
-        c.free_cash_flow_b = $free_cash_flow_b,
-        c.debt_to_equity = $debt_to_equity,
-        c.pe_ratio = $pe_ratio,
-        c.price_to_sales = $price_to_sales,
-        c.employee_count_est = $employee_count_est,
-        c.github_stars = $github_stars,
-        c.moat_durability = $moat_durability,
-        c.moat_reasoning = $moat_reasoning,
-        c.enterprise_readiness_score = $enterprise_readiness_score,
-        c.operational_improvement_potential = $operational_improvement_potential,
-        c.financial_profile_cluster = $financial_profile_cluster,
-        c.developer_adoption_score = $developer_adoption_score,
-        c.product_maturity_score = $product_maturity_score,
-        c.customer_switching_cost = $customer_switching_cost,
-        c.revenue_predictability = $revenue_predictability,
-        c.market_timing_score = $market_timing_score
+    UNWIND $rows AS row
+    MERGE (c:Company {company_id: row.company_id})
+    SET c += row.props
     """
-
-    with driver.session() as session:
-        for c in companies:
-            fin = c.get("financials", {})
-            growth = c.get("growth_signals", {})
-            llm = c.get("llm_enriched", {})
-
-            params = {
-                "company_id": c["company_id"],
-                "name": c["name"],
-                "ticker": c.get("ticker"),
-                "status": c["status"],
-                "sector": c["sector"],
-                "description": c.get("description", ""),
-                "founded_year": c.get("founded_year"),
-                "hq": c.get("hq"),
-                # Financials
-                "market_cap_b": fin.get("market_cap_b"),
-                "revenue_ttm_b": fin.get("revenue_ttm_b"),
-                "gross_margin": fin.get("gross_margin"),
-                "operating_margin": fin.get("operating_margin"),
-                "ebitda_b": fin.get("ebitda_b"),
-                "free_cash_flow_b": fin.get("free_cash_flow_b"),
-                "debt_to_equity": fin.get("debt_to_equity"),
-                "pe_ratio": fin.get("pe_ratio"),
-                "price_to_sales": fin.get("price_to_sales"),
-                # Growth signals
-                "employee_count_est": growth.get("employee_count_est"),
-                "github_stars": growth.get("github_stars"),
-                # LLM enriched
-                "moat_durability": llm.get("moat_durability"),
-                "moat_reasoning": llm.get("moat_reasoning"),
-                "enterprise_readiness_score": llm.get("enterprise_readiness_score"),
-                "operational_improvement_potential": llm.get("operational_improvement_potential"),
-                "financial_profile_cluster": llm.get("financial_profile_cluster"),
-                "developer_adoption_score": llm.get("developer_adoption_score"),
-                "product_maturity_score": llm.get("product_maturity_score"),
-                "customer_switching_cost": llm.get("customer_switching_cost"),
-                "revenue_predictability": llm.get("revenue_predictability"),
-                "market_timing_score": llm.get("market_timing_score"),
-            }
-            session.run(query, params)
+    # Generator: property maps are only built for the batch being written
+    rows = ({"company_id": c["company_id"], "props": _company_props(c)} for c in companies)
+    _write_batched(session, query, rows)
 
     print(f"Loaded {len(companies)} Company nodes.")
 
 
-def load_segments(driver, companies: list):
+def load_segments(session, companies: list):
     """Create Segment nodes and TARGETS_SAME_SEGMENT edges."""
-    with driver.session() as session:
-        for segment_id, display_name in SEGMENT_NAMES.items():
-            session.run(
-                "MERGE (s:Segment {name: $name}) SET s.display_name = $display_name",
-                {"name": segment_id, "display_name": display_name},
-            )
-
-        for c in companies:
-            session.run(
-                """
-                MATCH (c:Company {company_id: $company_id})
-                MATCH (s:Segment {name: $segment})
-                MERGE (c)-[:TARGETS_SAME_SEGMENT]->(s)
-                """,
-                {"company_id": c["company_id"], "segment": c["sector"]},
-            )
+    segments = [{"name": k, "display_name": v} for k, v in SEGMENT_NAMES.items()]
+    edges = ({"company_id": c["company_id"], "segment": c["sector"]} for c in companies)
+
+    _write_batched(
+        session,
+        """
+        UNWIND $rows AS seg
+        MERGE (s:Segment {name: seg.name}) SET s.display_name = seg.display_name
+        """,
+        segments,
+    )
+    _write_batched(
+        session,
+        """
+        UNWIND $rows AS e
+        MATCH (c:Company {company_id: e.company_id})
+        MATCH (s:Segment {name: e.segment})
+        MERGE (c)-[:TARGETS_SAME_SEGMENT]->(s)
+        """,
+        edges,
+    )
 
     print(f"Loaded {len(SEGMENT_NAMES)} Segment nodes with edges.")
 
 
-def load_investment_themes(driver, companies: list):
+def load_investment_themes(session, companies: list):
     """Create InvestmentTheme nodes and SHARES_INVESTMENT_THEME edges."""
-    themes_seen = set()
-    with driver.session() as session:
-        for c in companies:
-            llm = c.get("llm_enriched", {})
-            themes = llm.get("investment_themes", [])
-            for theme in themes:
-                if theme not in themes_seen:
-                    session.run(
-                        "MERGE (t:InvestmentTheme {name: $name})",
-                        {"name": theme},
-                    )
-                    themes_seen.add(theme)
-                session.run(
-                    """
-                    MATCH (c:Company {company_id: $company_id})
-                    MATCH (t:InvestmentTheme {name: $theme})
-                    MERGE (c)-[:SHARES_INVESTMENT_THEME]->(t)
-                    """,
-                    {"company_id": c["company_id"], "theme": theme},
-                )
-
-    print(f"Loaded {len(themes_seen)} InvestmentTheme nodes with edges.")
-
-
-def load_relationships(driver, companies: list):
-    """Create inter-company relationship edges from LLM enrichment."""
-    # Build set of valid company_ids
-    valid_ids = {c["company_id"] for c in companies}
+    edges = [
+        {"company_id": c["company_id"], "theme": theme}
+        for c in companies
+        for theme in c.get("llm_enriched", {}).get("investment_themes", [])
+    ]
+    themes = list(dict.fromkeys(e["theme"] for e in edges))
+
+    _write_batched(session, "UNWIND $rows AS name MERGE (:InvestmentTheme {name: name})", themes)
+    _write_batched(
+        session,
+        """
+        UNWIND $rows AS e
+        MATCH (c:Company {company_id: e.company_id})
+        MATCH (t:InvestmentTheme {name: e.theme})
+        MERGE (c)-[:SHARES_INVESTMENT_THEME]->(t)
+        """,
+        edges,
+    )
+
+    print(f"Loaded {len(themes)} InvestmentTheme nodes with edges.")
+
+
+def load_relationships(session, companies: list, valid_ids: frozenset | None = None):
+    """Create inter-company relationship edges from LLM enrichment.
+
+    `valid_ids` is the set of loaded company_ids; run() builds it once and
+    passes it in, standalone callers get it derived from `companies`.
+    """
+    if valid_ids is None:
+        valid_ids = frozenset(c["company_id"] for c in companies)
 
+    # Group edges by type so each type is written with one UNWIND batch
+    by_type: dict[str, list[dict]] = defaultdict(list)
     edge_count = 0
     skipped = 0
 
-    with driver.session() as session:
-        for c in companies:
-            llm = c.get("llm_enriched", {})
-            relationships = llm.get("competitive_relationships", [])
-
-            for rel in relationships:
-                target = rel.get("target_company_id", "")
-                rel_type = rel.get("relationship_type", "")
-                strength = rel.get("strength", 0.5)
-                reasoning = rel.get("reasoning", "")
-
-                if target not in valid_ids:
-                    skipped += 1
-                    continue
-
-                # Create the edge using APOC-free approach (parameterized relationship type)
-                # Neo4j doesn't support parameterized relationship types directly,
-                # so we use a CASE approach with all known types
-                for known_type in ["COMPETES_WITH", "DISRUPTS", "PARTNERS_WITH",
-                                   "SIMILAR_FINANCIAL_PROFILE", "ACQUIRED", "SUPPLIES_TO"]:
-                    if rel_type == known_type:
-                        query = f"""
-                        MATCH (a:Company {{company_id: $source}})
-                        MATCH (b:Company {{company_id: $target}})
-                        MERGE (a)-[r:{known_type}]->(b)
-                        SET r.strength = $strength, r.reasoning = $reasoning
-                        """
-                        session.run(query, {
-                            "source": c["company_id"],
-                            "target": target,
-                            "strength": strength,
-                            "reasoning": reasoning,
-                        })
-                        edge_count += 1
-
-                        # Create reverse edge for bidirectional relationships
-                        if known_type in BIDIRECTIONAL:
-                            reverse_query = f"""
-                            MATCH (a:Company {{company_id: $target}})
-                            MATCH (b:Company {{company_id: $source}})
-                            MERGE (a)-[r:{known_type}]->(b)
-                            SET r.strength = $strength, r.reasoning = $reasoning
-                            """
-                            session.run(reverse_query, {
-                                "source": c["company_id"],
-                                "target": target,
-                                "strength": strength,
-                                "reasoning": reasoning,
-                            })
-                        break
+    for c in companies:
+        llm = c.get("llm_enriched", {})
+        for rel in llm.get("competitive_relationships", []):
+            target = rel.get("target_company_id", "")
+            if target not in valid_ids:
+                skipped += 1
+                continue
+            rel_type = rel.get("relationship_type", "")
+            if rel_type not in _KNOWN_TYPES:
+                continue
+            row = {
+                "source": c["company_id"],
+                "target": target,
+                "strength": rel.get("strength", 0.5),
+                "reasoning": rel.get("reasoning", ""),
+            }
+            by_type[rel_type].append(row)
+            # Reverse edge for bidirectional relationships, kept right after its
+            # forward edge so later MERGE/SETs win in the same order as before
+            if rel_type in BIDIRECTIONAL:
+                by_type[rel_type].append({**row, "source": target, "target": c["company_id"]})
+            edge_count += 1
+
+    # Neo4j doesn't support parameterized relationship types, so the type is
+    # interpolated — only from the fixed RELATIONSHIP_TYPES whitelist.
+    for rel_type in RELATIONSHIP_TYPES:
+        rows = by_type.get(rel_type)
+        if not rows:
+            continue
+        query = f"""
+        UNWIND $rows AS row
+        MATCH (a:Company {{company_id: row.source}})
+        MATCH (b:Company {{company_id: row.target}})
+        MERGE (a)-[r:{rel_type}]->(b)
+        SET r.strength = row.strength, r.reasoning = row.reasoning
+        """
+        _write_batched(session, query, rows)
 
     print(f"Loaded {edge_count} relationship edges (skipped {skipped} invalid targets).")
 
 
+def stamp_graph_version(session):
+    """Record the load time; API processes compare it to drop results cached before this load."""
+    session.run(
+        "MERGE (m:GraphMeta {key: 'graph'}) SET m.loaded_at = datetime().epochMillis"
+    )
+    print("Stamped graph version.")
+
+
 def run():
     """Main loader: connect to Neo4j and load everything."""
     print("Connecting to Neo4j...")
@@ -263,26 +289,31 @@ def run():
     with open(COMPANIES_FILE, "r") as f:
         data = json.load(f)
     companies = data["companies"]
+    valid_ids = frozenset(c["company_id"] for c in companies)
 
     print(f"\nLoading {len(companies)} companies into Neo4j...")
     print()
 
-    # Clear and reload
-    clear_graph(driver)
-    run_schema(driver)
-    load_companies(driver, companies)
-    load_segments(driver, companies)
-    load_investment_themes(driver, companies)
-    load_relationships(driver, companies)
-
-    # Summary
+    # Clear and reload — one session for the whole load; each loader commits
+    # its rows in BATCH_SIZE write transactions
     with driver.session() as session:
+        clear_graph(session)
+        run_schema(session)
+        load_companies(session, companies)
+        load_segments(session, companies)
+        load_investment_themes(session, companies)
+        load_relationships(session, companies, valid_ids)
+
+        # Summary
         node_count = session.run("MATCH (n) RETURN count(n) AS count").single()["count"]
         edge_count = session.run("MATCH ()-[r]->() RETURN count(r) AS count").single()["count"]
         print("\n=== Graph Summary ===")
         print(f"Total nodes: {node_count}")
         print(f"Total edges: {edge_count}")
 
+        # Last, so API processes only drop their caches once the load is complete
+        stamp_graph_version(session)
+
     driver.close()
     print("\nDone.")
 
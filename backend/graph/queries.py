@@ -2,18 +2,132 @@
 Cypher query templates for InvestorLens.
 Reusable graph queries for the search pipeline.
 """
+import atexit
 import sys
 import os
+import threading
+import time
+from typing import Iterator
 
-from neo4j import GraphDatabase
+from neo4j import READ_ACCESS, GraphDatabase, Result, RoutingControl
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+from config import (
+    NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, GRAPH_CACHE_TTL, GRAPH_VERSION_CHECK_INTERVAL,
+    NEO4J_POOL_SIZE, NEO4J_ACQUISITION_TIMEOUT, NEO4J_MAX_RETRY_TIME,
+)
 
 
-def get_driver():
-    """Get a Neo4j driver instance."""
-    return GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+def get_driver(max_connection_pool_size: int = NEO4J_POOL_SIZE,
+               connection_acquisition_timeout: float = NEO4J_ACQUISITION_TIMEOUT,
+               max_transaction_retry_time: float = NEO4J_MAX_RETRY_TIME):
+    """Get a new Neo4j driver instance. The caller owns it and must close it.
+
+    Pool and retry settings default to the NEO4J_* values in config.
+    """
+    return GraphDatabase.driver(
+        NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD),
+        max_connection_pool_size=max_connection_pool_size,
+        connection_acquisition_timeout=connection_acquisition_timeout,
+        max_transaction_retry_time=max_transaction_retry_time,
+    )
+
+
+_shared_driver = None
+_shared_driver_lock = threading.Lock()
+
+
+def get_shared_driver():
+    """Get the process-wide Neo4j driver, creating it on first use.
+
+    Drivers are thread-safe and own the connection pool, so request handlers
+    share this one instead of paying connection setup per call. Connectivity
+    is verified once at creation; the driver is closed at interpreter exit,
+    so callers must not close it.
+    """
+    global _shared_driver
+    if _shared_driver is None:
+        with _shared_driver_lock:
+            if _shared_driver is None:
+                driver = get_driver()
+                driver.verify_connectivity()
+                atexit.register(driver.close)
+                _shared_driver = driver
+    return _shared_driver
+
+
+def shared_driver_ready() -> bool:
+    """True once get_shared_driver() has created (and verified) the driver."""
+    return _shared_driver is not None
+
+
+# Results of full-scan listing queries, keyed by caller-chosen tuples.
+# The graph only changes on a reload, so entries live for GRAPH_CACHE_TTL or
+# until graph_version() sees a newer load stamp, whichever comes first.
+_result_cache: dict[tuple, tuple[float, object, object]] = {}
+_result_cache_lock = threading.Lock()
+
+# (checked_at, version) of the last GraphMeta read
+_graph_version: tuple[float, object] | None = None
+_graph_version_lock = threading.Lock()
+
+
+def graph_version(driver=None):
+    """The loaded_at stamp graph/loader.py writes on each load (None if absent).
+
+    Re-read from Neo4j at most every GRAPH_VERSION_CHECK_INTERVAL seconds.
+    Seeing a new stamp drops every cached result.
+    """
+    global _graph_version
+    now = time.monotonic()
+    with _graph_version_lock:
+        checked = _graph_version
+    if checked and now - checked[0] < GRAPH_VERSION_CHECK_INTERVAL:
+        return checked[1]
+
+    rows = _read(driver or get_shared_driver(),
+                 "MATCH (m:GraphMeta {key: 'graph'}) RETURN m.loaded_at AS loaded_at")
+    version = rows[0]["loaded_at"] if rows else None
+    with _graph_version_lock:
+        changed = _graph_version is not None and _graph_version[1] != version
+        _graph_version = (now, version)
+    if changed:
+        invalidate_cache()
+    return version
+
+
+def cached_result(key: tuple, fetch, driver=None):
+    """Return the cached value for `key`, calling fetch() on a miss, expiry or graph reload.
+
+    `driver` is only used for the graph_version() check (shared driver if None).
+    """
+    now = time.monotonic()
+    version = graph_version(driver)
+    with _result_cache_lock:
+        hit = _result_cache.get(key)
+    if hit and hit[1] == version and now - hit[0] < GRAPH_CACHE_TTL:
+        return hit[2]
+    value = fetch()
+    with _result_cache_lock:
+        _result_cache[key] = (now, version, value)
+    return value
+
+
+def invalidate_cache():
+    """Drop every cached listing result; graph_version() calls this after a reload."""
+    with _result_cache_lock:
+        _result_cache.clear()
+
+
+def _read(driver, query: str, **params) -> list[dict]:
+    """Run a one-shot read query as an auto-committed, read-routed transaction.
+
+    execute_query skips the explicit session/transaction setup of
+    driver.session(), and Result.data returns the rows as plain dicts.
+    """
+    return driver.execute_query(
+        query, params, routing_=RoutingControl.READ, result_transformer_=Result.data,
+    )
 
 
 def get_company(driver, company_id: str) -> dict | None:
@@ -22,11 +136,8 @@ def get_company(driver, company_id: str) -> dict | None:
     MATCH (c:Company {company_id: $company_id})
     RETURN c
     """
-    with driver.session() as session:
-        result = session.run(query, {"company_id": company_id}).single()
-        if result:
-            return dict(result["c"])
-    return None
+    rows = _read(driver, query, company_id=company_id)
+    return rows[0]["c"] if rows else None
 
 
 def get_competitors(driver, company_id: str, limit: int = 20) -> list[dict]:
@@ -46,9 +157,7 @@ def get_competitors(driver, company_id: str, limit: int = 20) -> list[dict]:
     ORDER BY strength DESC
     LIMIT $limit
     """
-    with driver.session() as session:
-        results = session.run(query, {"company_id": company_id, "limit": limit})
-        return [dict(r) for r in results]
+    return _read(driver, query, company_id=company_id, limit=limit)
 
 
 def get_competitors_via_segment(driver, company_id: str, limit: int = 20) -> list[dict]:
@@ -67,9 +176,7 @@ def get_competitors_via_segment(driver, company_id: str, limit: int = 20) -> lis
            t.financial_profile_cluster AS financial_profile_cluster
     LIMIT $limit
     """
-    with driver.session() as session:
-        results = session.run(query, {"company_id": company_id, "limit": limit})
-        return [dict(r) for r in results]
+    return _read(driver, query, company_id=company_id, limit=limit)
 
 
 def get_companies_sharing_themes(driver, company_id: str, limit: int = 20) -> list[dict]:
@@ -86,9 +193,7 @@ def get_companies_sharing_themes(driver, company_id: str, limit: int = 20) -> li
     ORDER BY theme_overlap DESC
     LIMIT $limit
     """
-    with driver.session() as session:
-        results = session.run(query, {"company_id": company_id, "limit": limit})
-        return [dict(r) for r in results]
+    return _read(driver, query, company_id=company_id, limit=limit)
 
 
 def get_disruption_targets(driver, company_id: str) -> list[dict]:
@@ -100,77 +205,94 @@ def get_disruption_targets(driver, company_id: str) -> list[dict]:
            CASE WHEN startNode(r) = c THEN 'disrupts' ELSE 'disrupted_by' END AS direction
     ORDER BY r.strength DESC
     """
-    with driver.session() as session:
-        results = session.run(query, {"company_id": company_id})
-        return [dict(r) for r in results]
+    return _read(driver, query, company_id=company_id)
+
+
+# Variable-length bounds can't be parameters, so each supported depth gets its
+# own fixed query text; repeated calls at a depth reuse Neo4j's cached plan.
+#
+# Every prefix of a matched path is itself a match, so the subgraph's nodes are
+# c plus each path's end node, and its edges are each path's last relationship.
+# Collecting those directly avoids unwinding every node and relationship of
+# every path before deduplication.
+_SUBGRAPH_TEMPLATE = """
+MATCH (c:Company {company_id: $company_id})
+      -[r:COMPETES_WITH|DISRUPTS|PARTNERS_WITH|TARGETS_SAME_SEGMENT|SHARES_INVESTMENT_THEME*1..__DEPTH__]->(t)
+WITH c, COLLECT(DISTINCT t) AS reached, COLLECT(DISTINCT last(r)) AS edges
+WITH [c] + [n IN reached WHERE n <> c] AS nodes, edges
+RETURN
+  [n IN nodes | {
+    id: CASE WHEN n:Company THEN n.company_id
+         WHEN n:Segment THEN n.name
+         WHEN n:InvestmentTheme THEN n.name
+         END,
+    label: CASE WHEN n:Company THEN n.name
+           WHEN n:Segment THEN n.display_name
+           WHEN n:InvestmentTheme THEN n.name
+           END,
+    type: CASE WHEN n:Company THEN 'company'
+          WHEN n:Segment THEN 'segment'
+          WHEN n:InvestmentTheme THEN 'theme'
+          END,
+    sector: CASE WHEN n:Company THEN n.sector ELSE null END,
+    market_cap_b: CASE WHEN n:Company THEN n.market_cap_b ELSE null END,
+    moat_durability: CASE WHEN n:Company THEN n.moat_durability ELSE null END
+  }][0..50] AS nodes,
+  [e IN edges | {
+    source: CASE WHEN startNode(e):Company THEN startNode(e).company_id
+            WHEN startNode(e):Segment THEN startNode(e).name
+            WHEN startNode(e):InvestmentTheme THEN startNode(e).name
+            END,
+    target: CASE WHEN endNode(e):Company THEN endNode(e).company_id
+            WHEN endNode(e):Segment THEN endNode(e).name
+            WHEN endNode(e):InvestmentTheme THEN endNode(e).name
+            END,
+    type: type(e),
+    strength: e.strength
+  }][0..100] AS edges
+"""
+_SUBGRAPH_QUERIES = {d: _SUBGRAPH_TEMPLATE.replace("__DEPTH__", str(d)) for d in (1, 2, 3)}
 
 
 def get_subgraph(driver, company_id: str, depth: int = 2, limit: int = 50) -> dict:
     """Get the neighborhood subgraph for visualization.
     Returns nodes and edges suitable for graph rendering.
+    Depth is 1-3; anything else falls back to 2.
     """
-    query = """
-    MATCH path = (c:Company {company_id: $company_id})-[r*1..""" + str(depth) + """]->(t)
-    WHERE ALL(rel IN r WHERE type(rel) IN ['COMPETES_WITH', 'DISRUPTS', 'PARTNERS_WITH', 'TARGETS_SAME_SEGMENT', 'SHARES_INVESTMENT_THEME'])
-    WITH nodes(path) AS ns, relationships(path) AS rs
-    UNWIND ns AS n
-    WITH COLLECT(DISTINCT n) AS nodes, COLLECT(DISTINCT rs) AS all_rels
-    UNWIND all_rels AS rel_list
-    UNWIND rel_list AS rel
-    WITH nodes, COLLECT(DISTINCT rel) AS edges
-    RETURN
-      [n IN nodes | {
-        id: CASE WHEN n:Company THEN n.company_id
-             WHEN n:Segment THEN n.name
-             WHEN n:InvestmentTheme THEN n.name
-             END,
-        label: CASE WHEN n:Company THEN n.name
-               WHEN n:Segment THEN n.display_name
-               WHEN n:InvestmentTheme THEN n.name
-               END,
-        type: CASE WHEN n:Company THEN 'company'
-              WHEN n:Segment THEN 'segment'
-              WHEN n:InvestmentTheme THEN 'theme'
-              END,
-        sector: CASE WHEN n:Company THEN n.sector ELSE null END,
-        market_cap_b: CASE WHEN n:Company THEN n.market_cap_b ELSE null END,
-        moat_durability: CASE WHEN n:Company THEN n.moat_durability ELSE null END
-      }][0..50] AS nodes,
-      [e IN edges | {
-        source: CASE WHEN startNode(e):Company THEN startNode(e).company_id
-                WHEN startNode(e):Segment THEN startNode(e).name
-                WHEN startNode(e):InvestmentTheme THEN startNode(e).name
-                END,
-        target: CASE WHEN endNode(e):Company THEN endNode(e).company_id
-                WHEN endNode(e):Segment THEN endNode(e).name
-                WHEN endNode(e):InvestmentTheme THEN endNode(e).name
-                END,
-        type: type(e),
-        strength: e.strength
-      }][0..100] AS edges
-    """
-    with driver.session() as session:
-        result = session.run(query, {"company_id": company_id}).single()
-        if result:
-            return {"nodes": result["nodes"], "edges": result["edges"]}
+    query = _SUBGRAPH_QUERIES.get(depth, _SUBGRAPH_QUERIES[2])
+    rows = _read(driver, query, company_id=company_id)
+    if rows:
+        return {"nodes": rows[0]["nodes"], "edges": rows[0]["edges"]}
     return {"nodes": [], "edges": []}
 
 
-def get_all_companies(driver) -> list[dict]:
-    """Get all companies with key attributes."""
-    query = """
-    MATCH (c:Company)
-    RETURN c.company_id AS company_id, c.name AS name, c.sector AS sector,
-           c.status AS status, c.market_cap_b AS market_cap_b,
-           c.moat_durability AS moat_durability,
-           c.enterprise_readiness_score AS enterprise_readiness_score,
-           c.developer_adoption_score AS developer_adoption_score,
-           c.financial_profile_cluster AS financial_profile_cluster
-    ORDER BY c.market_cap_b DESC
+_ALL_COMPANIES_QUERY = """
+MATCH (c:Company)
+RETURN c.company_id AS company_id, c.name AS name, c.sector AS sector,
+       c.status AS status, c.market_cap_b AS market_cap_b,
+       c.moat_durability AS moat_durability,
+       c.enterprise_readiness_score AS enterprise_readiness_score,
+       c.developer_adoption_score AS developer_adoption_score,
+       c.financial_profile_cluster AS financial_profile_cluster
+ORDER BY c.market_cap_b DESC
+"""
+
+
+def iter_all_companies(driver) -> Iterator[dict]:
+    """Stream all companies with key attributes, uncached.
+
+    Rows are pulled from the Bolt cursor as the caller consumes them, so a
+    consumer that filters or stops early never holds the whole scan.
     """
-    with driver.session() as session:
-        results = session.run(query)
-        return [dict(r) for r in results]
+    with driver.session(default_access_mode=READ_ACCESS) as session:
+        for rec in session.run(_ALL_COMPANIES_QUERY):
+            yield rec.data()
+
+
+def get_all_companies(driver) -> list[dict]:
+    """Get all companies with key attributes (cached for GRAPH_CACHE_TTL)."""
+    rows = cached_result(("all_companies",), lambda: list(iter_all_companies(driver)), driver)
+    return [dict(r) for r in rows]
 
 
 def get_similar_financial_profiles(driver, company_id: str, limit: int = 10) -> list[dict]:
@@ -184,9 +306,7 @@ def get_similar_financial_profiles(driver, company_id: str, limit: int = 10) ->
     ORDER BY r.strength DESC
     LIMIT $limit
     """
-    with driver.session() as session:
-        results = session.run(query, {"company_id": company_id, "limit": limit})
-        return [dict(r) for r in results]
+    return _read(driver, query, company_id=company_id, limit=limit)
 
 
 def get_partnerships(driver, company_id: str) -> list[dict]:
@@ -197,41 +317,82 @@ def get_partnerships(driver, company_id: str) -> list[dict]:
            r.strength AS strength, r.reasoning AS reasoning
     ORDER BY r.strength DESC
     """
-    with driver.session() as session:
-        results = session.run(query, {"company_id": company_id})
-        return [dict(r) for r in results]
+    return _read(driver, query, company_id=company_id)
 
 
 # --- Verification queries ---
 
+# Uniqueness constraints the id lookups rely on for index seeks, as
+# (constraint name, label, property) — names match schema.cypher
+_REQUIRED_CONSTRAINTS = (
+    ("company_id", "Company", "company_id"),
+    ("segment_name", "Segment", "name"),
+    ("theme_name", "InvestmentTheme", "name"),
+)
+
+
+def ensure_constraints(driver) -> list[str]:
+    """Create any missing id uniqueness constraint; return the ones created.
+
+    Without them every `{company_id: $id}` match is a label scan plus
+    property filter instead of an index seek.
+    """
+    rows = _read(driver, "SHOW CONSTRAINTS YIELD type, labelsOrTypes, properties")
+    existing = {
+        (r["labelsOrTypes"][0], r["properties"][0])
+        for r in rows
+        if ("UNIQUE" in r["type"] or "KEY" in r["type"])
+        and len(r["labelsOrTypes"] or []) == 1 and len(r["properties"] or []) == 1
+    }
+    created = []
+    for name, label, prop in _REQUIRED_CONSTRAINTS:
+        if (label, prop) not in existing:
+            driver.execute_query(
+                f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE"
+            )
+            created.append(f"{label}.{prop}")
+    return created
+
+
 def verify_graph(driver):
     """Run verification queries and print summary."""
-    with driver.session() as session:
-        # Node counts
-        company_count = session.run("MATCH (c:Company) RETURN count(c) AS n").single()["n"]
-        segment_count = session.run("MATCH (s:Segment) RETURN count(s) AS n").single()["n"]
-        theme_count = session.run("MATCH (t:InvestmentTheme) RETURN count(t) AS n").single()["n"]
-
-        # Edge counts by type
-        edge_types = session.run("""
-            MATCH ()-[r]->()
-            RETURN type(r) AS type, count(r) AS count
-            ORDER BY count DESC
-        """)
-        edge_summary = [(r["type"], r["count"]) for r in edge_types]
-
-        # Sector distribution
-        sectors = session.run("""
-            MATCH (c:Company)
-            RETURN c.sector AS sector, count(c) AS count
-            ORDER BY count DESC
-        """)
-        sector_summary = [(r["sector"], r["count"]) for r in sectors]
+    created = ensure_constraints(driver)
+
+    # One round-trip: each CALL subquery reduces to a single row, so the
+    # outer query returns exactly one row of scalars and collected lists.
+    query = """
+    CALL { MATCH (c:Company) RETURN count(c) AS companies }
+    CALL { MATCH (s:Segment) RETURN count(s) AS segments }
+    CALL { MATCH (t:InvestmentTheme) RETURN count(t) AS themes }
+    CALL {
+        // Edge counts by type
+        MATCH ()-[r]->()
+        WITH type(r) AS type, count(r) AS count
+        ORDER BY count DESC
+        RETURN collect({type: type, count: count}) AS edges
+    }
+    CALL {
+        // Sector distribution
+        MATCH (c:Company)
+        WITH c.sector AS sector, count(c) AS count
+        ORDER BY count DESC
+        RETURN collect({sector: sector, count: count}) AS sectors
+    }
+    RETURN companies, segments, themes, edges, sectors
+    """
+    row = _read(driver, query)[0]
+    company_count = row["companies"]
+    segment_count = row["segments"]
+    theme_count = row["themes"]
+    edge_summary = [(e["type"], e["count"]) for e in row["edges"]]
+    sector_summary = [(s["sector"], s["count"]) for s in row["sectors"]]
 
     print("=== Graph Verification ===")
     print(f"Companies: {company_count}")
     print(f"Segments: {segment_count}")
     print(f"Investment Themes: {theme_count}")
+    if created:
+        print(f"Created missing constraints: {', '.join(created)}")
     print()
     print("Edge types:")
     for etype, count in edge_summary:
@@ -248,6 +409,7 @@ def verify_graph(driver):
         "themes": theme_count,
         "edges": edge_summary,
         "sectors": sector_summary,
+        "constraints_created": created,
     }
 
 
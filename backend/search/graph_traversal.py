@@ -1,17 +1,25 @@
 """
 Graph traversal for InvestorLens search pipeline.
 Retrieves candidate companies from Neo4j based on query type.
+Each retrieval function takes a Neo4j driver; pass None to use the shared one.
 """
 import sys
 import os
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from operator import itemgetter
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from graph.queries import cached_result, get_shared_driver
 
 
-@dataclass
+@dataclass(slots=True)
 class CandidateCompany:
-    """A candidate company retrieved from the graph with full attributes."""
+    """A candidate company retrieved from the graph with full attributes.
+
+    Slotted: one is built per result row, so instances skip the per-object
+    __dict__ and attribute access goes through fixed slot offsets.
+    """
     company_id: str
     name: str
     sector: str
@@ -38,20 +46,17 @@ class CandidateCompany:
     yoy_employee_growth: float | None = None
     github_stars: int | None = None
     # Graph context
-    graph_edges: list = None       # edges that connected this candidate
+    graph_edges: list = field(default_factory=list)  # edges that connected this candidate
     competition_strength: float = 0.0
     partnership_count: int = 0
     partnership_fit: float = 0.0   # partnership with acquirer specifically
     competitive_threat: float = 0.0  # shared competitors with target
 
-    def __post_init__(self):
-        if self.graph_edges is None:
-            self.graph_edges = []
 
-
-def _full_company_query() -> str:
-    """Return Cypher RETURN clause for all company attributes."""
-    return """
+# Cypher RETURN items for all company attributes of `t`. Includes the distinct
+# PARTNERS_WITH partner count as a COUNT { } subquery, evaluated per row in the
+# same query rather than in a follow-up round-trip.
+_FULL_COMPANY_RETURN = """
         t.company_id AS company_id, t.name AS name, t.sector AS sector,
         t.moat_durability AS moat_durability,
         t.enterprise_readiness_score AS enterprise_readiness_score,
@@ -71,295 +76,370 @@ def _full_company_query() -> str:
         t.pe_ratio AS pe_ratio,
         t.price_to_sales AS price_to_sales,
         t.yoy_employee_growth AS yoy_employee_growth,
-        t.github_stars AS github_stars
+        t.github_stars AS github_stars,
+        COUNT { MATCH (t)-[:PARTNERS_WITH]-(p:Company) RETURN DISTINCT p } AS partnership_count
     """
 
 
+# Columns of _FULL_COMPANY_RETURN that map 1:1 onto the leading
+# CandidateCompany fields, in dataclass field order
+_CANDIDATE_FIELDS = (
+    "company_id", "name", "sector",
+    "moat_durability", "enterprise_readiness_score", "developer_adoption_score",
+    "product_maturity_score", "customer_switching_cost", "revenue_predictability",
+    "market_timing_score", "operational_improvement_potential",
+    "market_cap_b", "revenue_ttm_b", "gross_margin", "operating_margin",
+    "ebitda_b", "free_cash_flow_b", "debt_to_equity", "pe_ratio", "price_to_sales",
+    "yoy_employee_growth", "github_stars",
+)
+_candidate_values = itemgetter(*_CANDIDATE_FIELDS)
+
+
 def _record_to_candidate(record: dict, edges: list | None = None) -> CandidateCompany:
-    """Convert a Neo4j record dict to CandidateCompany."""
+    """Convert a Neo4j record to CandidateCompany.
+
+    Expects every column from _FULL_COMPANY_RETURN. The leading fields are
+    pulled with one C-level itemgetter call and passed positionally.
+    """
     return CandidateCompany(
-        company_id=record["company_id"],
-        name=record["name"],
-        sector=record.get("sector", ""),
-        moat_durability=record.get("moat_durability"),
-        enterprise_readiness_score=record.get("enterprise_readiness_score"),
-        developer_adoption_score=record.get("developer_adoption_score"),
-        product_maturity_score=record.get("product_maturity_score"),
-        customer_switching_cost=record.get("customer_switching_cost"),
-        revenue_predictability=record.get("revenue_predictability"),
-        market_timing_score=record.get("market_timing_score"),
-        operational_improvement_potential=record.get("operational_improvement_potential"),
-        market_cap_b=record.get("market_cap_b"),
-        revenue_ttm_b=record.get("revenue_ttm_b"),
-        gross_margin=record.get("gross_margin"),
-        operating_margin=record.get("operating_margin"),
-        ebitda_b=record.get("ebitda_b"),
-        free_cash_flow_b=record.get("free_cash_flow_b"),
-        debt_to_equity=record.get("debt_to_equity"),
-        pe_ratio=record.get("pe_ratio"),
-        price_to_sales=record.get("price_to_sales"),
-        yoy_employee_growth=record.get("yoy_employee_growth"),
-        github_stars=record.get("github_stars"),
+        *_candidate_values(record),
         graph_edges=edges or [],
+        partnership_count=record["partnership_count"],
     )
 
 
-def get_competitors_to(driver, company_id: str, persona: str | None = None) -> list[CandidateCompany]:
+def _competitors_to_query(theme_names: str) -> str:
+    """Build the fused competitor traversal; `theme_names` fills shared_themes."""
+    return f"""
+        CALL {{
+            // 1. Direct COMPETES_WITH edges
+            MATCH (c:Company {{company_id: $cid}})-[r:COMPETES_WITH]-(t:Company)
+            WITH t, max(r.strength) AS strength
+            RETURN t, 'COMPETES_WITH' AS edge_type, strength, null AS direction,
+                   null AS shared_segment, null AS shared_themes, null AS overlap
+            UNION ALL
+            // 2. TARGETS_SAME_SEGMENT siblings
+            MATCH (c:Company {{company_id: $cid}})-[:TARGETS_SAME_SEGMENT]->(s:Segment)<-[:TARGETS_SAME_SEGMENT]-(t:Company)
+            WHERE t.company_id <> $cid
+            RETURN t, 'TARGETS_SAME_SEGMENT' AS edge_type, null AS strength, null AS direction,
+                   s.display_name AS shared_segment, null AS shared_themes, null AS overlap
+            UNION ALL
+            // 3. SHARES_INVESTMENT_THEME overlaps — theme overlap adds context but isn't
+            //    sufficient to call something a competitor, so it only annotates
+            //    companies that one of the other three traversals also reaches
+            MATCH (c:Company {{company_id: $cid}})-[:SHARES_INVESTMENT_THEME]->(th:InvestmentTheme)<-[:SHARES_INVESTMENT_THEME]-(t:Company)
+            WHERE t.company_id <> $cid
+              AND (EXISTS {{ (c)-[:COMPETES_WITH|DISRUPTS]-(t) }}
+                   OR EXISTS {{ (c)-[:TARGETS_SAME_SEGMENT]->(:Segment)<-[:TARGETS_SAME_SEGMENT]-(t) }})
+            WITH t, {theme_names} AS shared_themes, count(th) AS overlap
+            RETURN t, 'SHARES_INVESTMENT_THEME' AS edge_type, null AS strength, null AS direction,
+                   null AS shared_segment, shared_themes, overlap
+            UNION ALL
+            // 4. DISRUPTS edges (always include, but Growth VC persona boosts these)
+            MATCH (c:Company {{company_id: $cid}})-[r:DISRUPTS]-(t:Company)
+            RETURN t, 'DISRUPTS' AS edge_type, r.strength AS strength,
+                   CASE WHEN startNode(r) = c THEN 'disrupts' ELSE 'disrupted_by' END AS direction,
+                   null AS shared_segment, null AS shared_themes, null AS overlap
+        }}
+        RETURN {_FULL_COMPANY_RETURN}, edge_type, strength, direction,
+               shared_segment, shared_themes, overlap
+    """
+
+
+# Prebuilt at import, keyed by needs_themes, so the text per variant is stable
+_COMPETITORS_TO_QUERIES = {
+    False: _competitors_to_query("null"),
+    True: _competitors_to_query("collect(th.name)"),
+}
+
+
+def get_competitors_to(driver, company_id: str, persona: str | None = None,
+                       needs_themes: bool = False) -> list[CandidateCompany]:
     """Get competitor candidates via multiple traversal strategies.
 
     Merges results from COMPETES_WITH, TARGETS_SAME_SEGMENT,
-    SHARES_INVESTMENT_THEME, and optionally DISRUPTS.
-    """
-    candidates: dict[str, CandidateCompany] = {}
+    SHARES_INVESTMENT_THEME, and optionally DISRUPTS. All four traversals
+    and the partnership counts come back from one UNION ALL query, each row
+    tagged with the edge_type that produced it.
 
-    # 1. Direct COMPETES_WITH edges
-    query = f"""
-    MATCH (c:Company {{company_id: $cid}})-[r:COMPETES_WITH]-(t:Company)
-    WITH t, max(r.strength) AS strength
-    RETURN {_full_company_query()}, strength
+    Theme edges always carry the overlap count; the shared theme names (the
+    edge's "themes" key) are only collected when needs_themes is set, e.g.
+    for the agent tools whose LLM reads them.
     """
-    with driver.session() as session:
-        for rec in session.run(query, {"cid": company_id}):
-            r = dict(rec)
-            cand = _record_to_candidate(r, [{"type": "COMPETES_WITH", "strength": r["strength"]}])
-            cand.competition_strength = r["strength"] or 0.0
-            candidates[cand.company_id] = cand
+    driver = driver or get_shared_driver()
 
-    # 2. TARGETS_SAME_SEGMENT siblings
-    query = f"""
-    MATCH (c:Company {{company_id: $cid}})-[:TARGETS_SAME_SEGMENT]->(s:Segment)<-[:TARGETS_SAME_SEGMENT]-(t:Company)
-    WHERE t.company_id <> $cid
-    RETURN {_full_company_query()}, s.display_name AS shared_segment
-    """
-    with driver.session() as session:
-        for rec in session.run(query, {"cid": company_id}):
-            r = dict(rec)
-            cid = r["company_id"]
-            edge = {"type": "TARGETS_SAME_SEGMENT", "segment": r.get("shared_segment")}
-            if cid in candidates:
-                candidates[cid].graph_edges.append(edge)
-            else:
-                candidates[cid] = _record_to_candidate(r, [edge])
-
-    # 3. SHARES_INVESTMENT_THEME overlaps
-    query = f"""
-    MATCH (c:Company {{company_id: $cid}})-[:SHARES_INVESTMENT_THEME]->(th:InvestmentTheme)<-[:SHARES_INVESTMENT_THEME]-(t:Company)
-    WHERE t.company_id <> $cid
-    WITH t, collect(th.name) AS shared_themes, count(th) AS overlap
-    RETURN {_full_company_query()}, shared_themes, overlap
-    """
-    with driver.session() as session:
-        for rec in session.run(query, {"cid": company_id}):
-            r = dict(rec)
-            cid = r["company_id"]
-            edge = {"type": "SHARES_INVESTMENT_THEME", "themes": r.get("shared_themes"), "overlap": r.get("overlap")}
-            if cid in candidates:
-                candidates[cid].graph_edges.append(edge)
-            else:
-                candidates[cid] = _record_to_candidate(r, [edge])
-
-    # 4. DISRUPTS edges (always include, but Growth VC persona boosts these)
-    query = f"""
-    MATCH (c:Company {{company_id: $cid}})-[r:DISRUPTS]-(t:Company)
-    RETURN {_full_company_query()},
-           r.strength AS strength,
-           CASE WHEN startNode(r) = c THEN 'disrupts' ELSE 'disrupted_by' END AS direction
-    """
     with driver.session() as session:
-        for rec in session.run(query, {"cid": company_id}):
-            r = dict(rec)
-            cid = r["company_id"]
-            edge = {"type": "DISRUPTS", "strength": r.get("strength"), "direction": r.get("direction")}
-            if cid in candidates:
-                candidates[cid].graph_edges.append(edge)
-            else:
-                candidates[cid] = _record_to_candidate(r, [edge])
-
-    # Filter out candidates connected ONLY via SHARES_INVESTMENT_THEME —
-    # theme overlap adds context but isn't sufficient to call something a competitor.
-    filtered = {}
-    for cid, cand in candidates.items():
-        edge_types = {e.get("type") for e in cand.graph_edges}
-        has_strong_edge = edge_types & {"COMPETES_WITH", "DISRUPTS", "TARGETS_SAME_SEGMENT"}
-        if has_strong_edge:
-            filtered[cid] = cand
-    candidates = filtered
+        records = session.execute_read(
+            lambda tx: list(tx.run(_COMPETITORS_TO_QUERIES[needs_themes], cid=company_id))
+        )
+    return _competitors_from_records(records)
+
+
+# UNION ALL branch order of the competitor / acquisition traversals. Neo4j
+# doesn't guarantee the row order of UNION ALL or CALL subqueries, and
+# candidate order decides ranking tie-breaks, so the mergers below sort rows
+# by (branch, company_id, segment) instead of relying on arrival order.
+_COMPETITOR_BRANCHES = ("COMPETES_WITH", "TARGETS_SAME_SEGMENT", "SHARES_INVESTMENT_THEME", "DISRUPTS")
+_ACQUISITION_BRANCHES = ("COMPETES_WITH", "DISRUPTS", "TARGETS_SAME_SEGMENT")
+
+
+def _in_branch_order(records, branches: tuple[str, ...]) -> list:
+    """Traversal rows in a deterministic order: branch, then company_id, then segment."""
+    rank = {edge_type: i for i, edge_type in enumerate(branches)}
+    return sorted(
+        records,
+        key=lambda r: (rank[r["edge_type"]], r["company_id"], r["shared_segment"] or ""),
+    )
 
-    # Enrich partnership counts for all candidates
-    _enrich_partnership_counts(driver, candidates)
+
+def _competitors_from_records(records) -> list[CandidateCompany]:
+    """Merge competitor traversal rows (one per company per edge type) into candidates."""
+    candidates: dict[str, CandidateCompany] = {}
+    for r in _in_branch_order(records, _COMPETITOR_BRANCHES):
+        edge_type = r["edge_type"]
+        if edge_type == "COMPETES_WITH":
+            edge = {"type": edge_type, "strength": r["strength"]}
+        elif edge_type == "TARGETS_SAME_SEGMENT":
+            edge = {"type": edge_type, "segment": r["shared_segment"]}
+        elif edge_type == "SHARES_INVESTMENT_THEME":
+            edge = {"type": edge_type, "overlap": r["overlap"]}
+            # Names are only fetched on request; leave the key out rather than ship null
+            if r["shared_themes"] is not None:
+                edge["themes"] = r["shared_themes"]
+        else:
+            edge = {"type": edge_type, "strength": r["strength"], "direction": r["direction"]}
+
+        # One lookup per row; insert only on first sight of a company
+        cand = candidates.get(r["company_id"])
+        if cand is None:
+            cand = candidates[r["company_id"]] = _record_to_candidate(r, [edge])
+        else:
+            cand.graph_edges.append(edge)
+        if edge_type == "COMPETES_WITH":
+            cand.competition_strength = r["strength"] or 0.0
 
     return list(candidates.values())
 
 
-def get_compare_data(driver, company_a: str, company_b: str) -> dict:
-    """Get structured comparison data for two companies.
+_COMPETITORS_BATCH_QUERY = f"""
+UNWIND $cids AS cid
+MATCH (c:Company {{company_id: cid}})-[r:COMPETES_WITH]-(t:Company)
+WITH cid, t, max(r.strength) AS strength
+RETURN cid, {_FULL_COMPANY_RETURN}, strength
+ORDER BY cid, strength DESC
+"""
 
-    Returns both company nodes, their shared edges, common competitors, etc.
-    """
-    result = {"company_a": None, "company_b": None, "shared_edges": [], "common_competitors": [], "shared_segments": [], "shared_themes": []}
 
-    # Full node data for both
-    for label, cid in [("company_a", company_a), ("company_b", company_b)]:
-        query = """
-        MATCH (t:Company {company_id: $cid})
-        RETURN """ + _full_company_query()
-        with driver.session() as session:
-            rec = session.run(query, {"cid": cid}).single()
-            if rec:
-                result[label] = _record_to_candidate(dict(rec))
+def get_competitors_to_batch(driver, company_ids: list[str]) -> dict[str, list[CandidateCompany]]:
+    """Get direct COMPETES_WITH competitors for several companies at once.
 
-    # Direct relationships between them
-    query = """
-    MATCH (a:Company {company_id: $a})-[r]-(b:Company {company_id: $b})
-    RETURN type(r) AS rel_type, r.strength AS strength, r.reasoning AS reasoning
+    One UNWIND query covers every id, so a page listing competitors for N
+    companies pays one round-trip instead of N. Returns {company_id: candidates},
+    strongest first; ids with no competitors (or not in the graph) map to [].
     """
+    driver = driver or get_shared_driver()
+    result: dict[str, list[CandidateCompany]] = {cid: [] for cid in company_ids}
     with driver.session() as session:
-        for rec in session.run(query, {"a": company_a, "b": company_b}):
-            result["shared_edges"].append(dict(rec))
-
-    # Common competitors
-    query = f"""
-    MATCH (a:Company {{company_id: $a}})-[:COMPETES_WITH]-(common:Company)-[:COMPETES_WITH]-(b:Company {{company_id: $b}})
-    WHERE common.company_id <> $a AND common.company_id <> $b
-    WITH DISTINCT common
-    MATCH (t:Company {{company_id: common.company_id}})
-    RETURN {_full_company_query()}
-    """
-    with driver.session() as session:
-        for rec in session.run(query, {"a": company_a, "b": company_b}):
-            result["common_competitors"].append(_record_to_candidate(dict(rec)))
+        records = session.execute_read(lambda tx: list(tx.run(_COMPETITORS_BATCH_QUERY, cids=list(result))))
 
-    # Shared segments
-    query = """
-    MATCH (a:Company {company_id: $a})-[:TARGETS_SAME_SEGMENT]->(s:Segment)<-[:TARGETS_SAME_SEGMENT]-(b:Company {company_id: $b})
-    RETURN s.name AS segment, s.display_name AS display_name
-    """
-    with driver.session() as session:
-        for rec in session.run(query, {"a": company_a, "b": company_b}):
-            result["shared_segments"].append(dict(rec))
+    for r in records:
+        cand = _record_to_candidate(r, [{"type": "COMPETES_WITH", "strength": r["strength"]}])
+        cand.competition_strength = r["strength"] or 0.0
+        result[r["cid"]].append(cand)
+    return result
 
-    # Shared themes
-    query = """
-    MATCH (a:Company {company_id: $a})-[:SHARES_INVESTMENT_THEME]->(th:InvestmentTheme)<-[:SHARES_INVESTMENT_THEME]-(b:Company {company_id: $b})
-    RETURN th.name AS theme
-    """
-    with driver.session() as session:
-        for rec in session.run(query, {"a": company_a, "b": company_b}):
-            result["shared_themes"].append(rec["theme"])
 
-    return result
+# Full node data for one company
+_COMPARE_COMPANY_QUERY = f"""
+MATCH (t:Company {{company_id: $cid}})
+RETURN {_FULL_COMPANY_RETURN}
+"""
 
+# Direct relationships between the pair
+_COMPARE_EDGES_QUERY = """
+MATCH (a:Company {company_id: $a})-[r]-(b:Company {company_id: $b})
+RETURN type(r) AS rel_type, r.strength AS strength, r.reasoning AS reasoning
+"""
 
-def get_acquisition_targets(driver, acquirer: str, compete_with: str) -> list[CandidateCompany]:
-    """Find acquisition targets for an acquirer to compete with a target company.
+# Common competitors
+_COMPARE_COMMON_QUERY = f"""
+MATCH (a:Company {{company_id: $a}})-[:COMPETES_WITH]-(common:Company)-[:COMPETES_WITH]-(b:Company {{company_id: $b}})
+WHERE common.company_id <> $a AND common.company_id <> $b
+WITH DISTINCT common
+MATCH (t:Company {{company_id: common.company_id}})
+RETURN {_FULL_COMPANY_RETURN}
+"""
 
-    Strategy:
-    1. Companies that COMPETES_WITH or DISRUPTS the target
-    2. Bonus for companies that PARTNERS_WITH the acquirer
-    3. Exclude the acquirer and the target themselves
+# Shared segments
+_COMPARE_SEGMENTS_QUERY = """
+MATCH (a:Company {company_id: $a})-[:TARGETS_SAME_SEGMENT]->(s:Segment)<-[:TARGETS_SAME_SEGMENT]-(b:Company {company_id: $b})
+RETURN s.name AS segment, s.display_name AS display_name
+"""
+
+# Shared themes
+_COMPARE_THEMES_QUERY = """
+MATCH (a:Company {company_id: $a})-[:SHARES_INVESTMENT_THEME]->(th:InvestmentTheme)<-[:SHARES_INVESTMENT_THEME]-(b:Company {company_id: $b})
+RETURN th.name AS theme
+"""
+
+
+def get_compare_data(driver, company_a: str, company_b: str) -> dict:
+    """Get structured comparison data for two companies.
+
+    Returns both company nodes, their shared edges, common competitors, etc.
     """
-    candidates: dict[str, CandidateCompany] = {}
+    driver = driver or get_shared_driver()
 
-    # 1. Companies competing with the target
-    query = f"""
+    def _fetch(query: str, convert, **params) -> list:
+        with driver.session() as session:
+            return [convert(rec) for rec in session.run(query, params)]
+
+    # The sections are independent, so they run concurrently — one session per
+    # thread on the thread-safe driver. Latency is the slowest query, not the sum.
+    pair = {"a": company_a, "b": company_b}
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        node_a = pool.submit(_fetch, _COMPARE_COMPANY_QUERY, _record_to_candidate, cid=company_a)
+        node_b = pool.submit(_fetch, _COMPARE_COMPANY_QUERY, _record_to_candidate, cid=company_b)
+        shared_edges = pool.submit(_fetch, _COMPARE_EDGES_QUERY, dict, **pair)
+        common = pool.submit(_fetch, _COMPARE_COMMON_QUERY, _record_to_candidate, **pair)
+        segments = pool.submit(_fetch, _COMPARE_SEGMENTS_QUERY, dict, **pair)
+        themes = pool.submit(_fetch, _COMPARE_THEMES_QUERY, itemgetter("theme"), **pair)
+
+    return {
+        "company_a": next(iter(node_a.result()), None),
+        "company_b": next(iter(node_b.result()), None),
+        "shared_edges": shared_edges.result(),
+        "common_competitors": common.result(),
+        "shared_segments": segments.result(),
+        "shared_themes": themes.result(),
+    }
+
+
+_ACQUISITION_TARGETS_QUERY = f"""
+CALL {{
+    // 1. Companies competing with the target
     MATCH (target:Company {{company_id: $target}})-[r:COMPETES_WITH]-(t:Company)
     WHERE t.company_id <> $acquirer
     WITH t, max(r.strength) AS strength
-    RETURN {_full_company_query()}, strength, 'COMPETES_WITH' AS rel_type
-    """
-    with driver.session() as session:
-        for rec in session.run(query, {"target": compete_with, "acquirer": acquirer}):
-            r = dict(rec)
-            cand = _record_to_candidate(r, [{"type": "COMPETES_WITH", "target": compete_with, "strength": r["strength"]}])
-            cand.competitive_threat = r["strength"] or 0.0
-            candidates[cand.company_id] = cand
-
-    # 2. Companies disrupting the target
-    query = f"""
+    RETURN t, 'COMPETES_WITH' AS edge_type, strength, null AS shared_segment
+    UNION ALL
+    // 2. Companies disrupting the target
     MATCH (target:Company {{company_id: $target}})<-[r:DISRUPTS]-(t:Company)
     WHERE t.company_id <> $acquirer
-    RETURN {_full_company_query()}, r.strength AS strength
-    """
-    with driver.session() as session:
-        for rec in session.run(query, {"target": compete_with, "acquirer": acquirer}):
-            r = dict(rec)
-            cid = r["company_id"]
-            edge = {"type": "DISRUPTS", "target": compete_with, "strength": r.get("strength")}
-            if cid in candidates:
-                candidates[cid].graph_edges.append(edge)
-                candidates[cid].competitive_threat = max(candidates[cid].competitive_threat, r.get("strength") or 0.0)
-            else:
-                cand = _record_to_candidate(r, [edge])
-                cand.competitive_threat = r.get("strength") or 0.0
-                candidates[cid] = cand
-
-    # 3. Companies in same segment as target (broader net)
-    query = f"""
+    RETURN t, 'DISRUPTS' AS edge_type, r.strength AS strength, null AS shared_segment
+    UNION ALL
+    // 3. Companies in same segment as target (broader net)
     MATCH (target:Company {{company_id: $target}})-[:TARGETS_SAME_SEGMENT]->(s:Segment)<-[:TARGETS_SAME_SEGMENT]-(t:Company)
     WHERE t.company_id <> $acquirer AND t.company_id <> $target
-    RETURN {_full_company_query()}, s.display_name AS shared_segment
+    RETURN t, 'TARGETS_SAME_SEGMENT' AS edge_type, null AS strength, s.display_name AS shared_segment
+}}
+RETURN {_FULL_COMPANY_RETURN}, edge_type, strength, shared_segment,
+       // 4. Partnership with acquirer — bonus for existing partners
+       [(a:Company {{company_id: $acquirer}})-[p:PARTNERS_WITH]-(t) | p.strength] AS acquirer_partnerships
+"""
+
+
+def get_acquisition_targets(driver, acquirer: str, compete_with: str) -> list[CandidateCompany]:
+    """Find acquisition targets for an acquirer to compete with a target company.
+
+    Strategy:
+    1. Companies that COMPETES_WITH or DISRUPTS the target
+    2. Bonus for companies that PARTNERS_WITH the acquirer
+    3. Exclude the acquirer and the target themselves
+
+    The traversals, the acquirer-partnership lookup and the partnership
+    counts are fetched in one UNION ALL query.
     """
+    driver = driver or get_shared_driver()
+
     with driver.session() as session:
-        for rec in session.run(query, {"target": compete_with, "acquirer": acquirer}):
-            r = dict(rec)
-            cid = r["company_id"]
-            edge = {"type": "TARGETS_SAME_SEGMENT", "segment": r.get("shared_segment")}
-            if cid in candidates:
-                candidates[cid].graph_edges.append(edge)
-            else:
-                candidates[cid] = _record_to_candidate(r, [edge])
-
-    # 4. Check partnership with acquirer — bonus for existing partners
-    query = """
-    MATCH (acquirer:Company {company_id: $acquirer})-[r:PARTNERS_WITH]-(t:Company)
-    RETURN t.company_id AS partner_id, r.strength AS strength
-    """
+        records = session.execute_read(
+            lambda tx: list(tx.run(_ACQUISITION_TARGETS_QUERY, target=compete_with, acquirer=acquirer))
+        )
+    return _acquisition_targets_from_records(records, acquirer, compete_with)
+
+
+def _acquisition_targets_from_records(records, acquirer: str, compete_with: str) -> list[CandidateCompany]:
+    """Merge acquisition traversal rows into candidates with threat and partnership fit."""
+    candidates: dict[str, CandidateCompany] = {}
     acquirer_partners = {}
-    with driver.session() as session:
-        for rec in session.run(query, {"acquirer": acquirer}):
-            acquirer_partners[rec["partner_id"]] = rec["strength"] or 0.0
+    for r in _in_branch_order(records, _ACQUISITION_BRANCHES):
+        edge_type = r["edge_type"]
+        strength = r["strength"]
+        if edge_type == "TARGETS_SAME_SEGMENT":
+            edge = {"type": edge_type, "segment": r["shared_segment"]}
+        else:
+            edge = {"type": edge_type, "target": compete_with, "strength": strength}
+
+        cid = r["company_id"]
+        cand = candidates.get(cid)
+        if cand is None:
+            cand = candidates[cid] = _record_to_candidate(r, [edge])
+        else:
+            cand.graph_edges.append(edge)
+        if edge_type == "COMPETES_WITH":
+            cand.competitive_threat = strength or 0.0
+        elif edge_type == "DISRUPTS":
+            cand.competitive_threat = max(cand.competitive_threat, strength or 0.0)
+
+        if r["acquirer_partnerships"]:
+            acquirer_partners[cid] = r["acquirer_partnerships"][-1] or 0.0
 
     for cid, cand in candidates.items():
         if cid in acquirer_partners:
             cand.partnership_fit = acquirer_partners[cid]
             cand.graph_edges.append({"type": "PARTNERS_WITH", "partner": acquirer, "strength": acquirer_partners[cid]})
 
-    # Enrich partnership counts
-    _enrich_partnership_counts(driver, candidates)
-
     return list(candidates.values())
 
 
-def get_attribute_ranked(driver, attribute: str, limit: int = 20) -> list[CandidateCompany]:
-    """Get all companies sorted by a specific attribute."""
-    # Validate attribute exists as a Neo4j property
-    valid_attrs = [
-        "moat_durability", "enterprise_readiness_score", "developer_adoption_score",
-        "product_maturity_score", "customer_switching_cost", "revenue_predictability",
-        "market_timing_score", "operational_improvement_potential",
-        "market_cap_b", "revenue_ttm_b", "operating_margin", "yoy_employee_growth",
-    ]
-    if attribute not in valid_attrs:
-        attribute = "moat_durability"  # safe fallback
-
-    query = f"""
+# Properties get_attribute_ranked can sort by. A property name can't be a query
+# parameter, so each attribute gets a prebuilt query: the text per attribute
+# never changes, which keeps Neo4j's plan cache hit on every call.
+RANKABLE_ATTRIBUTES = (
+    "moat_durability", "enterprise_readiness_score", "developer_adoption_score",
+    "product_maturity_score", "customer_switching_cost", "revenue_predictability",
+    "market_timing_score", "operational_improvement_potential",
+    "market_cap_b", "revenue_ttm_b", "operating_margin", "yoy_employee_growth",
+)
+
+_ATTRIBUTE_RANKED_QUERIES = {
+    attr: f"""
     MATCH (t:Company)
-    WHERE t.{attribute} IS NOT NULL
-    RETURN {_full_company_query()}
-    ORDER BY t.{attribute} DESC
+    WHERE t.{attr} IS NOT NULL
+    RETURN {_FULL_COMPANY_RETURN}
+    ORDER BY t.{attr} DESC, t.company_id
     LIMIT $limit
     """
-    candidates = []
-    with driver.session() as session:
-        for rec in session.run(query, {"limit": limit}):
-            candidates.append(_record_to_candidate(dict(rec)))
+    for attr in RANKABLE_ATTRIBUTES
+}
 
-    _enrich_partnership_counts(driver, {c.company_id: c for c in candidates})
-    return candidates
+
+def get_attribute_ranked(driver, attribute: str, limit: int = 20) -> list[CandidateCompany]:
+    """Get all companies sorted by a specific attribute.
+
+    The ranking is a full label scan that only changes when the graph is
+    reloaded, so it is cached (see graph.queries.cached_result). Callers get
+    fresh copies and may mutate them.
+    """
+    driver = driver or get_shared_driver()
+    # Unknown attributes fall back to moat_durability
+    if attribute not in _ATTRIBUTE_RANKED_QUERIES:
+        attribute = "moat_durability"
+    query = _ATTRIBUTE_RANKED_QUERIES[attribute]
+
+    def _fetch():
+        # Candidates are built straight off the Bolt cursor as rows arrive
+        with driver.session() as session:
+            return [_record_to_candidate(rec) for rec in session.run(query, {"limit": limit})]
+
+    cached = cached_result(("attribute_ranked", attribute, limit), _fetch, driver)
+    return [replace(c, graph_edges=list(c.graph_edges)) for c in cached]
 
 
 def get_graph_data(driver, company_ids: list[str], center_id: str = "") -> dict:
     """Get nodes + edges for visualization, covering the given company IDs."""
+    driver = driver or get_shared_driver()
     if not company_ids:
         return {"nodes": [], "edges": []}
 
@@ -380,8 +460,7 @@ def get_graph_data(driver, company_ids: list[str], center_id: str = "") -> dict:
     nodes = []
     all_edges = {}
     with driver.session() as session:
-        for rec in session.run(query, {"ids": company_ids}):
-            r = dict(rec)
+        for r in session.run(query, {"ids": list(dict.fromkeys(company_ids))}):
             nodes.append({
                 "id": r["id"],
                 "label": r["label"],
@@ -400,18 +479,227 @@ def get_graph_data(driver, company_ids: list[str], center_id: str = "") -> dict:
     return {"nodes": nodes, "edges": list(all_edges.values())}
 
 
-def _enrich_partnership_counts(driver, candidates: dict[str, "CandidateCompany"]):
-    """Add partnership_count to each candidate."""
-    if not candidates:
-        return
-    cids = list(candidates.keys())
-    query = """
-    MATCH (c:Company)-[r:PARTNERS_WITH]-(t:Company)
-    WHERE c.company_id IN $cids
-    RETURN c.company_id AS cid, count(DISTINCT t) AS partner_count
+# --- Candidates and visualization graph in one round-trip ---
+#
+# get_graph_data needs the persona-ranked top ids, so it can only run after
+# ranking. The *_GRAPH queries below instead return, next to every candidate
+# row, all Company-to-Company edges touching that candidate, plus rows for the
+# anchor companies (target / acquirer). The subgraph for whatever ids the
+# ranking picks is then cut locally by GraphIndex.subgraph.
+
+# Every Company-to-Company edge touching `t`, in get_graph_data's edge shape
+_COMPANY_LINKS = """
+    [(t)-[r]-(:Company) | {
+        source: startNode(r).company_id,
+        target: endNode(r).company_id,
+        type: type(r),
+        strength: r.strength
+    }]"""
+
+_CANDIDATE_COLUMNS = ", ".join(_CANDIDATE_FIELDS + ("partnership_count",))
+
+
+def _with_graph(query: str, extra_columns: tuple[str, ...]) -> str:
+    """Wrap a candidate query so each row carries `links`, and append anchor rows.
+
+    Candidate rows come back with is_anchor = false; the companies in
+    $anchor_ids come back as extra rows with is_anchor = true and null extras.
     """
+    extras = "".join(f", {c}" for c in extra_columns)
+    nulls = "".join(f", null AS {c}" for c in extra_columns)
+    return f"""
+CALL {{
+{query}
+}}
+MATCH (t:Company {{company_id: company_id}})
+RETURN {_CANDIDATE_COLUMNS}{extras}, {_COMPANY_LINKS} AS links, false AS is_anchor
+UNION ALL
+MATCH (t:Company)
+WHERE t.company_id IN $anchor_ids
+RETURN {_FULL_COMPANY_RETURN}{nulls}, {_COMPANY_LINKS} AS links, true AS is_anchor
+"""
+
+
+_COMPETITORS_TO_GRAPH_QUERY = _with_graph(
+    _COMPETITORS_TO_QUERIES[False],
+    ("edge_type", "strength", "direction", "shared_segment", "shared_themes", "overlap"),
+)
+
+_ACQUISITION_TARGETS_GRAPH_QUERY = _with_graph(
+    _ACQUISITION_TARGETS_QUERY,
+    ("edge_type", "strength", "shared_segment", "acquirer_partnerships"),
+)
+
+_ATTRIBUTE_RANKED_GRAPH_QUERIES = {
+    attr: _with_graph(query, ()) for attr, query in _ATTRIBUTE_RANKED_QUERIES.items()
+}
+
+# Both compared companies and their common competitors — the same node set
+# search() draws for a compare query
+_COMPARE_GRAPH_QUERY = f"""
+OPTIONAL MATCH (a:Company {{company_id: $a}})-[:COMPETES_WITH]-(common:Company)-[:COMPETES_WITH]-(b:Company {{company_id: $b}})
+WHERE common.company_id <> $a AND common.company_id <> $b
+WITH collect(DISTINCT common.company_id) AS common_ids
+MATCH (t:Company)
+WHERE t.company_id IN [$a, $b] + common_ids
+RETURN t.company_id AS company_id, t.name AS name, t.sector AS sector,
+       t.market_cap_b AS market_cap_b, t.moat_durability AS moat_durability,
+       {_COMPANY_LINKS} AS links
+"""
+
+_GRAPH_INDEX_QUERY = f"""
+MATCH (t:Company)
+WHERE t.company_id IN $ids
+RETURN t.company_id AS company_id, t.name AS name, t.sector AS sector,
+       t.market_cap_b AS market_cap_b, t.moat_durability AS moat_durability,
+       {_COMPANY_LINKS} AS links
+"""
+
+
+@dataclass
+class GraphIndex:
+    """Visualization nodes and their incident edges for a fetched company set."""
+    nodes: dict[str, dict] = field(default_factory=dict)       # company_id → node props
+    links: dict[str, list[dict]] = field(default_factory=dict)  # company_id → incident edges
+
+    def add(self, record):
+        """Index one row carrying company columns and a `links` list."""
+        cid = record["company_id"]
+        if cid not in self.nodes:
+            self.nodes[cid] = {
+                "id": cid,
+                "label": record["name"],
+                "type": "company",
+                "sector": record["sector"],
+                "market_cap_b": record["market_cap_b"],
+                "moat_durability": record["moat_durability"],
+            }
+            self.links[cid] = record["links"]
+
+    def subgraph(self, company_ids: list[str], center_id: str = "") -> dict:
+        """Same result as get_graph_data(driver, company_ids, center_id), built locally."""
+        ids = [cid for cid in dict.fromkeys(company_ids) if cid in self.nodes]
+        wanted = set(ids)
+        nodes = []
+        all_edges = {}
+        for cid in ids:
+            nodes.append({**self.nodes[cid], "is_center": cid == center_id})
+            for e in self.links[cid]:
+                if e["source"] in wanted and e["target"] in wanted:
+                    key = f"{e['source']}-{e['type']}-{e['target']}"
+                    if key not in all_edges:
+                        all_edges[key] = e
+        return {"nodes": nodes, "edges": list(all_edges.values())}
+
+
+def _read_with_graph(driver, query: str, **params) -> tuple[list, GraphIndex]:
+    """Run a *_GRAPH query; return its candidate rows and a GraphIndex over all rows."""
+    with driver.session() as session:
+        records = session.execute_read(lambda tx: list(tx.run(query, params)))
+    index = GraphIndex()
+    for r in records:
+        index.add(r)
+    return [r for r in records if not r["is_anchor"]], index
+
+
+def _graph_index(driver, query: str, **params) -> GraphIndex:
+    """Run a query returning company columns plus `links`; index every row."""
     with driver.session() as session:
-        for rec in session.run(query, {"cids": cids}):
-            cid = rec["cid"]
-            if cid in candidates:
-                candidates[cid].partnership_count = rec["partner_count"]
+        records = session.execute_read(lambda tx: list(tx.run(query, params)))
+    index = GraphIndex()
+    for r in records:
+        index.add(r)
+    return index
+
+
+def _compare_graph_index(driver, company_a: str, company_b: str) -> GraphIndex:
+    return _graph_index(driver, _COMPARE_GRAPH_QUERY, a=company_a, b=company_b)
+
+
+def get_graph_index(driver, company_ids: list[str]) -> GraphIndex:
+    """GraphIndex over the given companies, for cutting subgraphs of them later.
+
+    Lets a caller fetch the graph for a whole candidate set while it is still
+    ranking, then call subgraph() for the top ids instead of get_graph_data.
+    """
+    driver = driver or get_shared_driver()
+    if not company_ids:
+        return GraphIndex()
+    return _graph_index(driver, _GRAPH_INDEX_QUERY, ids=list(dict.fromkeys(company_ids)))
+
+
+def _cached_candidates(key: tuple, fetch, driver) -> tuple:
+    """cached_result for a (candidates, graph_index) pair; callers get fresh candidate copies.
+
+    Retrieval doesn't depend on the persona, so every persona ranking the
+    same query shares one round-trip.
+    """
+    cached, index = cached_result(key, fetch, driver)
+    return [replace(c, graph_edges=list(c.graph_edges)) for c in cached], index
+
+
+def get_candidates_and_graph(driver, query_type: str, **params) -> tuple:
+    """Retrieve a query type's candidates together with a GraphIndex for visualization.
+
+    query_type / params:
+        competitors_to      company_id
+        acquisition_target  acquirer, compete_with
+        attribute_search    attribute, limit (default 20)
+        compare             company_a, company_b
+
+    Returns (candidates, graph_index); for compare, (get_compare_data's dict,
+    graph_index), with the graph query running alongside the compare queries.
+    Call graph_index.subgraph(company_ids, center_id) once the ranking has
+    picked the ids to draw — no further round-trip is needed. All but compare
+    are cached for GRAPH_CACHE_TTL.
+    """
+    driver = driver or get_shared_driver()
+
+    if query_type == "competitors_to":
+        company_id = params["company_id"]
+
+        def _fetch():
+            records, index = _read_with_graph(
+                driver, _COMPETITORS_TO_GRAPH_QUERY, cid=company_id, anchor_ids=[company_id]
+            )
+            return _competitors_from_records(records), index
+
+        return _cached_candidates(("competitors_to_graph", company_id), _fetch, driver)
+
+    if query_type == "acquisition_target":
+        acquirer, compete_with = params["acquirer"], params["compete_with"]
+
+        def _fetch():
+            records, index = _read_with_graph(
+                driver, _ACQUISITION_TARGETS_GRAPH_QUERY,
+                target=compete_with, acquirer=acquirer, anchor_ids=[acquirer, compete_with],
+            )
+            return _acquisition_targets_from_records(records, acquirer, compete_with), index
+
+        return _cached_candidates(("acquisition_targets_graph", acquirer, compete_with), _fetch, driver)
+
+    if query_type == "attribute_search":
+        attribute = params.get("attribute")
+        if attribute not in _ATTRIBUTE_RANKED_GRAPH_QUERIES:
+            attribute = "moat_durability"
+        limit = params.get("limit", 20)
+
+        def _fetch():
+            records, index = _read_with_graph(
+                driver, _ATTRIBUTE_RANKED_GRAPH_QUERIES[attribute], limit=limit, anchor_ids=[]
+            )
+            # UNION ALL output order isn't guaranteed; restore the ranking order
+            # (attribute descending, ties by company_id as in the inner ORDER BY)
+            records.sort(key=lambda r: (-r[attribute], r["company_id"]))
+            return [_record_to_candidate(r) for r in records], index
+
+        return _cached_candidates(("attribute_ranked_graph", attribute, limit), _fetch, driver)
+
+    if query_type == "compare":
+        company_a, company_b = params["company_a"], params["company_b"]
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            index = pool.submit(_compare_graph_index, driver, company_a, company_b)
+            compare_data = get_compare_data(driver, company_a, company_b)
+        return compare_data, index.result()
+
+    raise ValueError(f"Unknown query type: {query_type}")
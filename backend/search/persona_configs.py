@@ -3,6 +3,7 @@ Persona scoring configurations for InvestorLens.
 Each persona defines weights for company attributes and preferred graph edge types.
 """
 from dataclasses import dataclass
+from functools import cache
 
 
 @dataclass
@@ -132,6 +133,54 @@ ATTRIBUTE_SOURCE_MAP = {
 }
 
 
+@dataclass(frozen=True)
+class CompiledPersona:
+    """Ranking view of a persona: one parallel tuple per attribute property.
+
+    `normalizers` holds how each column is scaled to 0-1: "llm" (score / 10),
+    "minmax" (across the candidate set), "binary" (value > 0) or "default"
+    (unknown attribute, constant 0.5). `source_fields` is None for unknown
+    attributes.
+    """
+    attr_names: tuple[str, ...]
+    weights: tuple[float, ...]
+    invert_mask: tuple[bool, ...]
+    normalizers: tuple[str, ...]
+    source_fields: tuple[str | None, ...]
+
+
+def _normalizer(attr_name: str) -> str:
+    """Pick the CompiledPersona normalizer for a scoring attribute."""
+    if attr_name not in ATTRIBUTE_SOURCE_MAP:
+        return "default"
+    if attr_name == "free_cash_flow_positive":
+        return "binary"
+    source_type, _ = ATTRIBUTE_SOURCE_MAP[attr_name]
+    return "llm" if source_type == "llm" else "minmax"
+
+
+def compile_persona(persona: PersonaConfig) -> CompiledPersona:
+    """Resolve a persona's weights, inversions and attribute sources up front."""
+    attr_names = tuple(persona.weights)
+    inverted = set(persona.inverted_attributes)
+    return CompiledPersona(
+        attr_names=attr_names,
+        weights=tuple(persona.weights[a] for a in attr_names),
+        invert_mask=tuple(a in inverted for a in attr_names),
+        normalizers=tuple(_normalizer(a) for a in attr_names),
+        source_fields=tuple(
+            ATTRIBUTE_SOURCE_MAP[a][1] if a in ATTRIBUTE_SOURCE_MAP else None
+            for a in attr_names
+        ),
+    )
+
+
+@cache
+def compiled(name: str) -> CompiledPersona:
+    """Compiled form of a registered persona, built once per process."""
+    return compile_persona(PERSONAS[name])
+
+
 def get_persona(name: str) -> PersonaConfig:
     """Get persona config by name. Raises KeyError if not found."""
     return PERSONAS[name]
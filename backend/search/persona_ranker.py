@@ -2,8 +2,11 @@
 Persona-based ranking engine for InvestorLens.
 Takes candidate companies + persona config → returns re-ranked results with score breakdowns.
 """
+import heapq
 from dataclasses import dataclass, field
-from .persona_configs import PersonaConfig, ATTRIBUTE_SOURCE_MAP
+from functools import cached_property
+from operator import itemgetter
+from .persona_configs import PERSONAS, CompiledPersona, PersonaConfig, compile_persona, compiled
 
 
 @dataclass
@@ -15,28 +18,17 @@ class RankedResult:
     graph_context: list = field(default_factory=list)
     rank: int = 0
 
+    @cached_property
+    def score_breakdown_sorted(self) -> tuple[tuple[str, float], ...]:
+        """score_breakdown items, largest contribution first (computed once)."""
+        return tuple(sorted(self.score_breakdown.items(), key=itemgetter(1), reverse=True))
 
-def _extract_raw_value(candidate, attr_name: str) -> float | None:
-    """Extract the raw value for a scoring attribute from a candidate."""
-    if attr_name not in ATTRIBUTE_SOURCE_MAP:
-        return None
 
-    source_type, source_field = ATTRIBUTE_SOURCE_MAP[attr_name]
-
-    if source_type == "graph":
-        # Graph-computed attributes live directly on the candidate
-        return getattr(candidate, source_field, None)
-
-    if source_type == "llm":
-        return getattr(candidate, source_field, None)
-
-    if source_type == "financial":
-        return getattr(candidate, source_field, None)
-
-    if source_type == "growth":
-        return getattr(candidate, source_field, None)
-
-    return None
+def _raw_column(candidates: list, source_field: str | None) -> list[float | None]:
+    """Read one source field for every candidate; None when the attribute is unknown."""
+    if source_field is None:
+        return [None] * len(candidates)
+    return [getattr(cand, source_field, None) for cand in candidates]
 
 
 def _normalize_llm_score(value: float | None) -> float:
@@ -46,127 +38,182 @@ def _normalize_llm_score(value: float | None) -> float:
     return max(0.0, min(1.0, value / 10.0))
 
 
+# LLM scores are whole numbers on the 1-10 scale, so their normalized (and
+# inverted) values are tabulated; anything else falls back to the formula
+_LLM_NORMALIZED = {v: _normalize_llm_score(v) for v in (None, *range(11))}
+_LLM_INVERTED = {v: 1.0 - norm for v, norm in _LLM_NORMALIZED.items()}
+
+
 def _minmax_normalize(values: list[float | None], invert: bool = False) -> list[float]:
     """Min-max normalize a list of values to 0-1. Use 0.5 default for None."""
+    # A single value (or none) has zero span, so every entry is the 0.5 default
+    if len(values) <= 1:
+        return [0.5] * len(values)
+
     clean = [v for v in values if v is not None]
     if not clean:
         return [0.5] * len(values)
 
     vmin = min(clean)
-    vmax = max(clean)
-    span = vmax - vmin
-
-    result = []
-    for v in values:
-        if v is None:
-            result.append(0.5)
-        elif span == 0:
-            result.append(0.5)
-        else:
-            normalized = (v - vmin) / span
-            result.append(1.0 - normalized if invert else normalized)
-    return result
-
-
-def rank_candidates(candidates: list, persona: PersonaConfig, acquirer: str = "") -> list[RankedResult]:
+    span = max(clean) - vmin
+    if span == 0:
+        return [0.5] * len(values)
+
+    # Constant-per-call branches hoisted out of the element loop
+    if invert:
+        return [0.5 if v is None else 1.0 - (v - vmin) / span for v in values]
+    return [0.5 if v is None else (v - vmin) / span for v in values]
+
+
+def _normalize_column(normalizer: str, raw_values: list[float | None], invert: bool) -> list[float]:
+    """Normalize one attribute column to 0-1 using its CompiledPersona normalizer."""
+    if normalizer == "binary":
+        # Binary: fcf > 0 → 1.0, else 0.0
+        return [1.0 if (v is not None and v > 0) else 0.0 for v in raw_values]
+    if normalizer == "llm":
+        if invert:
+            # Invert: lower raw → higher score
+            table = _LLM_INVERTED
+            return [table[v] if v in table else 1.0 - _normalize_llm_score(v) for v in raw_values]
+        table = _LLM_NORMALIZED
+        return [table[v] if v in table else _normalize_llm_score(v) for v in raw_values]
+    if normalizer == "minmax":
+        return _minmax_normalize(raw_values, invert=invert)
+    return [0.5] * len(raw_values)
+
+
+# Bits of the edge-type mask used by _graph_boost; other edge types add nothing
+_COMPETES_WITH = 1
+_DISRUPTS = 2
+_TARGETS_SAME_SEGMENT = 4
+_EDGE_TYPE_BITS = {
+    "COMPETES_WITH": _COMPETES_WITH,
+    "DISRUPTS": _DISRUPTS,
+    "TARGETS_SAME_SEGMENT": _TARGETS_SAME_SEGMENT,
+}
+
+
+def _graph_boost(cand) -> float:
+    """Graph relevance boost: direct competitors rank higher than theme-only matches.
+
+    COMPETES_WITH → up to +0.15, DISRUPTS → +0.10, TARGETS_SAME_SEGMENT → +0.05,
+    SHARES_INVESTMENT_THEME only → no boost.
+    """
+    mask = 0
+    for e in cand.graph_edges:
+        mask |= _EDGE_TYPE_BITS.get(e.get("type"), 0)
+    if not mask:
+        return 0.0
+
+    graph_boost = 0.0
+    if mask & _COMPETES_WITH:
+        graph_boost = max(0.0, 0.15 * cand.competition_strength) if cand.competition_strength else 0.10
+    if mask & _DISRUPTS:
+        graph_boost = max(graph_boost, 0.10)
+    if mask & _TARGETS_SAME_SEGMENT and graph_boost == 0.0:
+        graph_boost = 0.05
+    return graph_boost
+
+
+def _score_kernel(rows: list[tuple[float, ...]], boosts: list[float]) -> list[float]:
+    """Composite score per candidate: weighted attribute sum plus graph boost, to 4 dp.
+
+    Pure numeric, no candidate objects: `rows[i]` holds candidate i's weighted
+    attribute values in persona order.
+    """
+    return [round(total + boost, 4) for total, boost in zip(map(sum, rows), boosts)]
+
+
+def _compiled_for(persona: PersonaConfig) -> CompiledPersona:
+    """Registered personas are compiled once; ad-hoc configs are compiled per call."""
+    if PERSONAS.get(persona.name) is persona:
+        return compiled(persona.name)
+    return compile_persona(persona)
+
+
+def _rank(candidates: list, spec: CompiledPersona, boosts: list[float],
+          normalized_cache: dict, top_k: int | None) -> list[RankedResult]:
+    """Rank non-empty `candidates` for one compiled persona.
+
+    `normalized_cache` maps (source_field, normalizer, invert) to a normalized
+    column and may be shared by calls over the same candidate list.
+    """
+    # One column per attribute holding every candidate's weighted, normalized value
+    columns = []
+    for weight, invert, normalizer, source_field in zip(
+        spec.weights, spec.invert_mask, spec.normalizers, spec.source_fields
+    ):
+        key = (source_field, normalizer, invert)
+        normalized = normalized_cache.get(key)
+        if normalized is None:
+            normalized = _normalize_column(normalizer, _raw_column(candidates, source_field), invert)
+            normalized_cache[key] = normalized
+        columns.append([v * weight for v in normalized])
+
+    # Composite scores first; sorting only needs these
+    rows = list(zip(*columns))
+    scores = _score_kernel(rows, boosts)
+
+    # Descending by composite score, ties kept in candidate order
+    if top_k is None:
+        order = sorted(range(len(candidates)), key=scores.__getitem__, reverse=True)
+    else:
+        order = heapq.nlargest(top_k, range(len(candidates)), key=scores.__getitem__)
+
+    attr_names = spec.attr_names
+    results = []
+    for rank, i in enumerate(order, start=1):
+        breakdown = dict(zip(attr_names, [round(w, 4) for w in rows[i]]))
+        breakdown["_graph_boost"] = round(boosts[i], 4)
+        cand = candidates[i]
+        results.append(RankedResult(
+            company_id=cand.company_id,
+            name=cand.name,
+            composite_score=scores[i],
+            score_breakdown=breakdown,
+            graph_context=cand.graph_edges,
+            rank=rank,
+        ))
+
+    return results
+
+
+def rank_candidates(candidates: list, persona: PersonaConfig, acquirer: str = "",
+                    top_k: int | None = None) -> list[RankedResult]:
     """Score and rank candidates using persona-specific weights.
 
     Args:
         candidates: list of CandidateCompany objects
         persona: PersonaConfig with weights and settings
         acquirer: company_id of acquirer (for acquisition queries)
+        top_k: if set, return only the top_k results; score breakdowns are
+               only built for the results that are returned
 
     Returns:
         Sorted list of RankedResult, highest composite score first.
     """
     if not candidates:
         return []
+    boosts = [_graph_boost(cand) for cand in candidates]
+    return _rank(candidates, _compiled_for(persona), boosts, {}, top_k)
 
-    weights = persona.weights
-    inverted = set(persona.inverted_attributes)
-
-    # Collect raw values per attribute across all candidates for normalization
-    attr_raw: dict[str, list[float | None]] = {}
-    for attr_name in weights:
-        raw_values = []
-        for cand in candidates:
-            raw_values.append(_extract_raw_value(cand, attr_name))
-        attr_raw[attr_name] = raw_values
-
-    # Normalize each attribute
-    attr_normalized: dict[str, list[float]] = {}
-    for attr_name, raw_values in attr_raw.items():
-        if attr_name not in ATTRIBUTE_SOURCE_MAP:
-            attr_normalized[attr_name] = [0.5] * len(candidates)
-            continue
-
-        source_type, _ = ATTRIBUTE_SOURCE_MAP[attr_name]
-        should_invert = attr_name in inverted
-
-        if attr_name == "free_cash_flow_positive":
-            # Binary: fcf > 0 → 1.0, else 0.0
-            attr_normalized[attr_name] = [
-                1.0 if (v is not None and v > 0) else 0.0
-                for v in raw_values
-            ]
-        elif source_type == "llm":
-            if should_invert:
-                # Invert: lower raw → higher score
-                attr_normalized[attr_name] = [
-                    1.0 - _normalize_llm_score(v) for v in raw_values
-                ]
-            else:
-                attr_normalized[attr_name] = [
-                    _normalize_llm_score(v) for v in raw_values
-                ]
-        elif source_type in ("financial", "growth"):
-            attr_normalized[attr_name] = _minmax_normalize(raw_values, invert=should_invert)
-        elif source_type == "graph":
-            attr_normalized[attr_name] = _minmax_normalize(raw_values, invert=should_invert)
-        else:
-            attr_normalized[attr_name] = [0.5] * len(candidates)
-
-    # Compute composite scores with graph relevance boost
-    results = []
-    for i, cand in enumerate(candidates):
-        breakdown = {}
-        composite = 0.0
-
-        for attr_name, weight in weights.items():
-            norm_val = attr_normalized.get(attr_name, [0.5] * len(candidates))[i]
-            weighted = norm_val * weight
-            breakdown[attr_name] = round(weighted, 4)
-            composite += weighted
-
-        # Graph relevance boost: direct competitors rank higher than theme-only matches.
-        # COMPETES_WITH → up to +0.15, DISRUPTS → +0.10, TARGETS_SAME_SEGMENT → +0.05,
-        # SHARES_INVESTMENT_THEME only → no boost.
-        graph_boost = 0.0
-        edge_types = {e.get("type") for e in cand.graph_edges}
-        if "COMPETES_WITH" in edge_types:
-            graph_boost = max(graph_boost, 0.15 * cand.competition_strength) if cand.competition_strength else 0.10
-        if "DISRUPTS" in edge_types:
-            graph_boost = max(graph_boost, 0.10)
-        if "TARGETS_SAME_SEGMENT" in edge_types and graph_boost == 0.0:
-            graph_boost = 0.05
-
-        composite += graph_boost
-        breakdown["_graph_boost"] = round(graph_boost, 4)
 
-        results.append(RankedResult(
-            company_id=cand.company_id,
-            name=cand.name,
-            composite_score=round(composite, 4),
-            score_breakdown=breakdown,
-            graph_context=cand.graph_edges,
-            rank=0,
-        ))
+def rank_candidates_batch(candidates: list, personas: list[PersonaConfig],
+                          top_k: int | None = None) -> dict[str, list[RankedResult]]:
+    """Rank one candidate set under several personas.
 
-    # Sort descending by composite score
-    results.sort(key=lambda r: r.composite_score, reverse=True)
+    Equivalent to calling rank_candidates per persona, but each attribute
+    column is extracted and normalized once and the graph boosts are computed
+    once, then reused by every persona that weights that attribute.
 
-    # Assign ranks
-    for i, r in enumerate(results):
-        r.rank = i + 1
-
-    return results
+    Returns:
+        persona name → sorted list of RankedResult.
+    """
+    if not candidates:
+        return {persona.name: [] for persona in personas}
+    boosts = [_graph_boost(cand) for cand in candidates]
+    normalized_cache: dict = {}
+    return {
+        persona.name: _rank(candidates, _compiled_for(persona), boosts, normalized_cache, top_k)
+        for persona in personas
+    }
@@ -2,11 +2,14 @@
 Query parser for InvestorLens search pipeline.
 Classifies natural language queries and extracts entities using pattern matching.
 """
+import hashlib
 import json
+import marshal
 import os
 import re
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from functools import cache, lru_cache
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from config import COMPANIES_FILE
@@ -25,9 +28,6 @@ class ParsedQuery:
 
 # --- Company name resolution ---
 
-# Canonical name → company_id mapping built from companies.json
-_COMPANY_LOOKUP: dict[str, str] | None = None
-
 # Manual aliases for common variations
 _ALIASES = {
     "snow": "snowflake",
@@ -100,12 +100,12 @@ _ALIASES = {
 }
 
 
-def _build_lookup() -> dict[str, str]:
-    """Build lowercase name → company_id lookup from companies.json + aliases."""
-    global _COMPANY_LOOKUP
-    if _COMPANY_LOOKUP is not None:
-        return _COMPANY_LOOKUP
+# Company-name suffixes also registered without the suffix ("Snowflake Inc" → "snowflake")
+_NAME_SUFFIXES = (" inc", " corporation", " technologies")
 
+
+def _lookup_from_source() -> dict[str, str]:
+    """Build lowercase name → company_id lookup from companies.json + aliases."""
     lookup = dict(_ALIASES)
     with open(COMPANIES_FILE) as f:
         data = json.load(f)
@@ -115,52 +115,131 @@ def _build_lookup() -> dict[str, str]:
         lookup[name_lower] = cid
         lookup[cid] = cid  # company_id itself works
         # Without "Inc." / "Corporation" etc.
-        for suffix in [" inc", " corporation", " technologies"]:
+        for suffix in _NAME_SUFFIXES:
             if name_lower.endswith(suffix):
                 lookup[name_lower[: -len(suffix)].strip()] = cid
-
-    _COMPANY_LOOKUP = lookup
     return lookup
 
 
+def _lookup_cache_dir() -> str:
+    """Per-user cache directory (mode 0700); refuses one another user could write to."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, "investorlens")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.stat(path)
+    if (hasattr(os, "getuid") and st.st_uid != os.getuid()) or st.st_mode & 0o022:
+        raise OSError(f"lookup cache dir {path} is not private to this user")
+    return path
+
+
+def _lookup_cache_path() -> str:
+    """Cache file for the built lookup, keyed by companies.json's mtime/size and the alias tables."""
+    st = os.stat(COMPANIES_FILE)
+    raw = f"{st.st_mtime_ns}:{st.st_size}:{sorted(_ALIASES.items())}:{_NAME_SUFFIXES}"
+    digest = hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()
+    return os.path.join(_lookup_cache_dir(), f"lookup_{digest}.marshal")
+
+
+@cache
+def _build_lookup() -> dict[str, str]:
+    """Lowercase name → company_id lookup, built once per process on first use.
+
+    Other processes (API workers, eval runs) load the marshalled copy written by
+    the first one instead of re-parsing companies.json; editing the file or the
+    alias tables changes the cache path. The cache holds plain data only and
+    anything that isn't a str → str dict is ignored; cache failures fall back
+    to a fresh build. Keys are interned so probes with interned strings compare
+    by identity. Callers must not mutate the result.
+    """
+    try:
+        cache_path = _lookup_cache_path()
+        with open(cache_path, "rb") as f:
+            lookup = marshal.load(f)
+        if not isinstance(lookup, dict):
+            raise ValueError("lookup cache is not a dict")
+        interned = {}
+        for alias, cid in lookup.items():
+            if type(alias) is not str or type(cid) is not str:
+                raise ValueError("lookup cache holds non-str entries")
+            interned[sys.intern(alias)] = cid
+        return interned
+    except Exception:  # missing, partial, foreign or unreadable cache: rebuild
+        pass
+
+    lookup = _lookup_from_source()
+    try:
+        cache_path = _lookup_cache_path()
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            marshal.dump(lookup, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return {sys.intern(alias): cid for alias, cid in lookup.items()}
+
+
+@cache
+def _aliases_by_length() -> tuple[tuple[str, str], ...]:
+    """Every (alias, company_id) pair, longest alias first (ties in lookup order)."""
+    lookup = _build_lookup()
+    return tuple((alias, lookup[alias]) for alias in sorted(lookup, key=len, reverse=True))
+
+
+@cache
+def _extractable_aliases() -> tuple[tuple[str, str], ...]:
+    """(alias, company_id) pairs long enough to extract from free text, longest first."""
+    # Two-character aliases like "c3" are too ambiguous to match inside a query
+    return tuple(pair for pair in _aliases_by_length() if len(pair[0]) > 2)
+
+
 def resolve_company(name: str) -> str | None:
     """Resolve a company name/alias to its company_id. Returns None if not found."""
+    return _resolve_key(name.lower().strip().rstrip("."))
+
+
+def _resolve_key(key: str) -> str | None:
+    """resolve_company for a key that is already lowercased and stripped."""
     lookup = _build_lookup()
-    key = name.lower().strip().rstrip(".")
     if key in lookup:
         return lookup[key]
-    # Try substring match — find the longest alias that appears in the name
-    best_match = None
-    best_len = 0
-    for alias, cid in lookup.items():
-        if len(alias) > best_len and alias in key:
-            best_match = cid
-            best_len = len(alias)
-    return best_match
+    # Try substring match — the first hit in longest-first order is the longest
+    # alias that appears in the name
+    for alias, cid in _aliases_by_length():
+        if alias in key:
+            return cid
+    return None
 
 
 # --- Persona detection ---
 
-_PERSONA_PATTERNS = {
-    "value_investor": r"value\s+invest",
-    "pe_firm": r"\bpe\b|private\s+equity",
-    "growth_vc": r"\bvc\b|venture\s+capital|growth\b",
-    "strategic_acquirer": r"strateg|acqui[rs]",
-    "enterprise_buyer": r"enterprise\s+buyer|buyer",
-}
-
-
-def _detect_persona(query: str) -> str | None:
-    """Detect persona from query text if specified."""
-    q = query.lower()
-    for persona, pattern in _PERSONA_PATTERNS.items():
-        if re.search(pattern, q):
-            return persona
+# Word-boundary checks that plain substring tests can't express; each only
+# runs once a cheap substring test has found its word in the query
+_PE_RE = re.compile(r"\bpe\b")
+_VC_OR_GROWTH_RE = re.compile(r"\bvc\b|growth\b")
+
+_LENS_RE = re.compile(r"(\w+)\s+lens")
+
+
+def _detect_persona(q: str) -> str | None:
+    """Detect persona from lowercased, whitespace-collapsed query text if specified.
+
+    Personas are checked in order; the first one mentioned wins.
+    """
+    if "value invest" in q:
+        return "value_investor"
+    if "private equity" in q or ("pe" in q and _PE_RE.search(q)):
+        return "pe_firm"
+    if "venture capital" in q or (("vc" in q or "growth" in q) and _VC_OR_GROWTH_RE.search(q)):
+        return "growth_vc"
+    if "strateg" in q or "acquir" in q or "acquis" in q:
+        return "strategic_acquirer"
+    if "buyer" in q:
+        return "enterprise_buyer"
     if "lens" in q:
         # "through a PE lens" etc. — try matching word before "lens"
-        m = re.search(r"(\w+)\s+lens", q)
+        m = _LENS_RE.search(q)
         if m:
-            word = m.group(1).lower()
+            word = m.group(1)
             if word in ("pe", "private"):
                 return "pe_firm"
             if word in ("vc", "growth", "venture"):
@@ -201,52 +280,87 @@ _ATTRIBUTE_MAP = {
 }
 
 
-def _detect_attribute(query: str) -> str | None:
-    """Detect the attribute being searched for."""
-    q = query.lower()
-    # Check longest keys first to prefer "moat durability" over "moat"
-    for key in sorted(_ATTRIBUTE_MAP, key=len, reverse=True):
+# (key, attribute) pairs, longest key first to prefer "moat durability" over "moat"
+_ATTRIBUTE_KEYS = tuple(
+    (key, _ATTRIBUTE_MAP[key]) for key in sorted(_ATTRIBUTE_MAP, key=len, reverse=True)
+)
+
+
+def _detect_attribute(q: str) -> str | None:
+    """Detect the attribute being searched for in lowercased query text.
+
+    Returns the attribute of the longest key contained in the query.
+    """
+    for key, attr in _ATTRIBUTE_KEYS:
         if key in q:
-            return _ATTRIBUTE_MAP[key]
+            return attr
     return None
 
 
 # --- Query classification ---
 
-def _extract_companies_from_query(query: str) -> list[str]:
-    """Extract all company references from a query, returning company_ids."""
-    lookup = _build_lookup()
+# Patterns are compiled once and tried in order within each query type; a match
+# whose companies fail to resolve falls through to the next pattern.
+
+_COMPETITOR_PATTERNS = (
+    re.compile(r"competitors?\s+(?:to|of|for)\s+(.+?)(?:\s+through|\s+from|\s+in\s+a|\s*$)"),
+    re.compile(r"who\s+competes?\s+with\s+(.+?)(?:\s+through|\s+from|\s+in\s+a|\s*$)"),
+    re.compile(r"competition\s+(?:to|of|for)\s+(.+?)(?:\s+through|\s+from|\s+in\s+a|\s*$)"),
+    re.compile(r"rivals?\s+(?:to|of|for)\s+(.+?)(?:\s+through|\s+from|\s+in\s+a|\s*$)"),
+)
+
+_COMPARE_PATTERNS = (
+    re.compile(r"compare\s+(.+?)\s+(?:vs\.?|versus|and|with)\s+(.+?)(?:\s+through|\s+from|\s+in\s+a|\s*$)"),
+    re.compile(r"(.+?)\s+(?:vs\.?|versus)\s+(.+?)(?:\s+through|\s+from|\s+in\s+a|\s*$)"),
+)
+
+_ACQUISITION_PATTERNS = (
+    re.compile(r"acquisition\s+target\s+for\s+(.+?)\s+to\s+compete\s+with\s+(.+?)(?:\s*$)"),
+    re.compile(r"(?:what|which|best)\s+.*?acqui\w+\s+.*?for\s+(.+?)\s+.*?(?:against|compete|rival)\s+.*?(.+?)(?:\s*$)"),
+    re.compile(r"(.+?)\s+should\s+acqui\w+\s+to\s+compete\s+with\s+(.+?)(?:\s*$)"),
+)
+
+
+def _extract_companies_from_query(q: str) -> list[str]:
+    """Extract all company references from lowercased query text, returning company_ids."""
     found = []
-    q = query.lower()
-
-    # Try matching longest aliases first to avoid partial matches
-    for alias in sorted(lookup, key=len, reverse=True):
-        if alias in q and len(alias) > 2:  # skip very short aliases
-            cid = lookup[alias]
-            if cid not in found:
-                found.append(cid)
-                # Remove the matched text to avoid double-matching
-                q = q.replace(alias, " ", 1)
+
+    # Try matching longest aliases first to avoid partial matches. Aliases of a
+    # company that is already found are skipped before the substring scan.
+    for alias, cid in _extractable_aliases():
+        if cid not in found and alias in q:
+            found.append(cid)
+            # Remove the matched text to avoid double-matching
+            q = q.replace(alias, " ", 1)
     return found
 
 
+def normalize_query(query: str) -> str:
+    """Lowercased, whitespace-collapsed query text: the key parse and search results are cached on."""
+    return " ".join(query.lower().split())
+
+
 def parse_query(query: str) -> ParsedQuery:
-    """Parse a natural language query into a structured ParsedQuery."""
-    q = query.lower().strip()
-    persona = _detect_persona(query)
+    """Parse a natural language query into a structured ParsedQuery.
+
+    Parses are cached on normalize_query(query); each call returns its own
+    copy carrying the caller's original text as raw_query.
+    """
+    return replace(_parse_normalized(normalize_query(query)), raw_query=query)
+
+
+@lru_cache(maxsize=2048)
+def _parse_normalized(query: str) -> ParsedQuery:
+    """Parse an already lowercased, whitespace-collapsed query; the body behind parse_query."""
+    q = query
+    persona = _detect_persona(q)
 
     # --- Type 1: competitors_to ---
     # "Competitors to Snowflake", "Who competes with C3 AI"
-    comp_patterns = [
-        r"competitors?\s+(?:to|of|for)\s+(.+?)(?:\s+through|\s+from|\s+in\s+a|\s*$)",
-        r"who\s+competes?\s+with\s+(.+?)(?:\s+through|\s+from|\s+in\s+a|\s*$)",
-        r"competition\s+(?:to|of|for)\s+(.+?)(?:\s+through|\s+from|\s+in\s+a|\s*$)",
-        r"rivals?\s+(?:to|of|for)\s+(.+?)(?:\s+through|\s+from|\s+in\s+a|\s*$)",
-    ]
-    for pat in comp_patterns:
-        m = re.search(pat, q)
+    for pat in _COMPETITOR_PATTERNS:
+        m = pat.search(q)
         if m:
-            target = resolve_company(m.group(1).strip())
+            target = _resolve_key(m.group(1).strip().rstrip("."))
             if target:
                 return ParsedQuery(
                     query_type="competitors_to",
@@ -257,15 +371,11 @@ def parse_query(query: str) -> ParsedQuery:
 
     # --- Type 2: compare ---
     # "Compare Databricks vs Snowflake through a PE lens"
-    cmp_patterns = [
-        r"compare\s+(.+?)\s+(?:vs\.?|versus|and|with)\s+(.+?)(?:\s+through|\s+from|\s+in\s+a|\s*$)",
-        r"(.+?)\s+(?:vs\.?|versus)\s+(.+?)(?:\s+through|\s+from|\s+in\s+a|\s*$)",
-    ]
-    for pat in cmp_patterns:
-        m = re.search(pat, q)
+    for pat in _COMPARE_PATTERNS:
+        m = pat.search(q)
         if m:
-            a = resolve_company(m.group(1).strip())
-            b = resolve_company(m.group(2).strip())
+            a = _resolve_key(m.group(1).strip().rstrip("."))
+            b = _resolve_key(m.group(2).strip().rstrip("."))
             if a and b:
                 return ParsedQuery(
                     query_type="compare",
@@ -277,16 +387,11 @@ def parse_query(query: str) -> ParsedQuery:
 
     # --- Type 3: acquisition_target ---
     # "Best acquisition target for Google to compete with Palantir"
-    acq_patterns = [
-        r"acquisition\s+target\s+for\s+(.+?)\s+to\s+compete\s+with\s+(.+?)(?:\s*$)",
-        r"(?:what|which|best)\s+.*?acqui\w+\s+.*?for\s+(.+?)\s+.*?(?:against|compete|rival)\s+.*?(.+?)(?:\s*$)",
-        r"(.+?)\s+should\s+acqui\w+\s+to\s+compete\s+with\s+(.+?)(?:\s*$)",
-    ]
-    for pat in acq_patterns:
-        m = re.search(pat, q)
+    for pat in _ACQUISITION_PATTERNS:
+        m = pat.search(q)
         if m:
-            acquirer = resolve_company(m.group(1).strip())
-            target = resolve_company(m.group(2).strip())
+            acquirer = _resolve_key(m.group(1).strip().rstrip("."))
+            target = _resolve_key(m.group(2).strip().rstrip("."))
             if acquirer and target:
                 return ParsedQuery(
                     query_type="acquisition_target",
@@ -298,7 +403,7 @@ def parse_query(query: str) -> ParsedQuery:
 
     # --- Type 4: attribute_search ---
     # "Which data infrastructure companies have the strongest moats?"
-    attr = _detect_attribute(query)
+    attr = _detect_attribute(q)
     if attr and any(kw in q for kw in ["which", "strongest", "best", "highest", "top", "most", "leading"]):
         return ParsedQuery(
             query_type="attribute_search",
@@ -308,7 +413,7 @@ def parse_query(query: str) -> ParsedQuery:
         )
 
     # --- Fallback: try to find any company reference and treat as competitors_to ---
-    companies = _extract_companies_from_query(query)
+    companies = _extract_companies_from_query(q)
     if len(companies) >= 2:
         return ParsedQuery(
             query_type="compare",
@@ -343,6 +448,9 @@ def parse_query(query: str) -> ParsedQuery:
     )
 
 
+parse_query.cache_clear = _parse_normalized.cache_clear
+
+
 if __name__ == "__main__":
     test_queries = [
         "Competitors to Snowflake",
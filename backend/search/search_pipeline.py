@@ -2,23 +2,34 @@
 Search pipeline orchestrator for InvestorLens.
 Orchestrates: parse → retrieve → rank.
 """
+import logging
 import sys
 import os
+import threading
 import time
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from itertools import islice
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from graph.queries import get_driver
-from search.query_parser import parse_query, ParsedQuery
+from config import SEARCH_CACHE_TTL, SEARCH_CACHE_SIZE
+from graph.queries import get_shared_driver, graph_version, shared_driver_ready
+from search.query_parser import normalize_query, parse_query, ParsedQuery
 from search.persona_configs import PERSONAS, get_persona, list_personas
-from search.graph_traversal import (
-    get_competitors_to, get_compare_data, get_acquisition_targets,
-    get_attribute_ranked, get_graph_data,
-)
-from search.persona_ranker import rank_candidates, RankedResult
+from search.graph_traversal import get_candidates_and_graph
+from search.persona_ranker import rank_candidates, rank_candidates_batch, RankedResult
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+# Persona names in display order; search_all_personas returns them in this order
+_PERSONA_NAMES = tuple(list_personas())
+
+# Query types _retrieve knows how to fetch
+_QUERY_TYPES = frozenset({"competitors_to", "compare", "acquisition_target", "attribute_search"})
+
+
+@dataclass(slots=True)
 class SearchResult:
     query: ParsedQuery
     persona: str
@@ -29,9 +40,18 @@ class SearchResult:
     metadata: dict = field(default_factory=dict)
 
 
+# (normalized query, persona) -> (inserted_at, graph version, SearchResult),
+# least recently used first
+_search_cache: OrderedDict = OrderedDict()
+_search_cache_lock = threading.Lock()
+
+
 def search(query: str, persona: str = "value_investor") -> SearchResult:
     """Execute a search query with persona-based ranking.
 
+    Results are cached per (query, persona) for SEARCH_CACHE_TTL seconds or
+    until the graph is reloaded; treat the returned SearchResult as read-only.
+
     Args:
         query: Natural language query string
         persona: Persona name (value_investor, pe_firm, growth_vc, strategic_acquirer, enterprise_buyer)
@@ -39,92 +59,146 @@ def search(query: str, persona: str = "value_investor") -> SearchResult:
     Returns:
         SearchResult with ranked companies, graph data, and metadata
     """
-    t_start = time.time()
+    parsed, connect_error = _parse_while_connecting(query)
+    if connect_error is not None:
+        raise connect_error
+    return search_with_parsed(parsed, persona)
+
+
+def _parse_while_connecting(query: str) -> tuple[ParsedQuery, Exception | None]:
+    """parse_query, overlapped with creating the shared driver on the first search.
+
+    Once the driver exists this is a plain parse_query call. Returns (parsed,
+    connect_error); the error is only reported for query types that need
+    Neo4j, and callers raise it rather than letting _retrieve connect again
+    and wait out a second timeout.
+    """
+    if shared_driver_ready():
+        return parse_query(query), None
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        connect = pool.submit(get_shared_driver)
+        parsed = parse_query(query)
+    if parsed.query_type not in _QUERY_TYPES:
+        return parsed, None
+    return parsed, connect.exception()
+
+
+def search_with_parsed(parsed: ParsedQuery, persona: str = "value_investor") -> SearchResult:
+    """search() for an already-parsed query, sharing search()'s result cache.
+
+    A cache hit is a copy carrying the caller's own parsed query and elapsed_ms,
+    with metadata["cached"] set.
+    """
+    t_start = time.perf_counter_ns()
+    key = (normalize_query(parsed.raw_query), persona)
+    now = time.monotonic()
+    # A graph reload invalidates cached results; before the first connect there
+    # is nothing cached from Neo4j to invalidate
+    version = graph_version() if shared_driver_ready() else None
+    with _search_cache_lock:
+        hit = _search_cache.get(key)
+        if hit and hit[1] == version and now - hit[0] < SEARCH_CACHE_TTL:
+            _search_cache.move_to_end(key)
+            cached = hit[2]
+            return replace(
+                cached,
+                query=parsed,
+                metadata={**cached.metadata, "elapsed_ms": _elapsed(t_start), "cached": True},
+            )
+
+    result = _search(parsed, persona)
+
+    with _search_cache_lock:
+        _search_cache[key] = (now, version, result)
+        _search_cache.move_to_end(key)
+        while len(_search_cache) > SEARCH_CACHE_SIZE:
+            _search_cache.popitem(last=False)
+    return result
+
+
+def _search_cache_clear():
+    with _search_cache_lock:
+        _search_cache.clear()
 
-    # 1. Parse
-    parsed = parse_query(query)
 
-    # 2. Resolve persona: query-embedded persona takes precedence
+search.cache_clear = _search_cache_clear
+
+
+def _search(parsed: ParsedQuery, persona: str) -> SearchResult:
+    """Uncached search_with_parsed(): retrieve and rank."""
+    t_start = time.perf_counter_ns()
+    retrieved = _retrieve(parsed)
+    return _rank_and_build(parsed, retrieved, persona, t_start)
+
+
+def _active_persona(parsed: ParsedQuery, persona: str) -> str:
+    """The persona a query actually ranks under."""
+    # Always use strategic_acquirer persona for acquisition queries
+    if parsed.query_type == "acquisition_target":
+        return "strategic_acquirer"
+    # Query-embedded persona takes precedence
     active_persona = parsed.persona or persona
     if active_persona not in PERSONAS:
         active_persona = "value_investor"
-    persona_config = get_persona(active_persona)
+    return active_persona
 
-    driver = get_driver()
-    try:
-        # 3. Retrieve candidates based on query type
-        if parsed.query_type == "competitors_to":
-            candidates = get_competitors_to(driver, parsed.target_company, active_persona)
-            ranked = rank_candidates(candidates, persona_config)
-            company_ids = [parsed.target_company] + [r.company_id for r in ranked[:10]]
-            graph = get_graph_data(driver, company_ids, center_id=parsed.target_company)
-
-            return SearchResult(
-                query=parsed,
-                persona=active_persona,
-                persona_display=persona_config.display_name,
-                results=ranked,
-                graph_data=graph,
-                metadata=_meta(t_start, len(candidates)),
-            )
 
-        elif parsed.query_type == "compare":
-            compare_data = get_compare_data(driver, parsed.target_company, parsed.compare_company)
-            # Rank the two companies + common competitors together
-            all_candidates = []
-            for key in ("company_a", "company_b"):
-                if compare_data[key]:
-                    all_candidates.append(compare_data[key])
-            all_candidates.extend(compare_data.get("common_competitors", []))
-            ranked = rank_candidates(all_candidates, persona_config)
+def _retrieve(parsed: ParsedQuery, driver=None) -> tuple | None:
+    """Persona-independent half of a search: fetch candidates and the graph.
 
-            company_ids = [parsed.target_company, parsed.compare_company] + [c.company_id for c in compare_data.get("common_competitors", [])]
-            graph = get_graph_data(driver, company_ids)
+    Each query type fetches its candidates and the visualization graph in one
+    round-trip; the graph is cut to the ranked top ids in _rank_and_build.
 
-            return SearchResult(
-                query=parsed,
-                persona=active_persona,
-                persona_display=persona_config.display_name,
-                results=ranked,
-                compare_data=compare_data,
-                graph_data=graph,
-                metadata=_meta(t_start, len(all_candidates)),
-            )
+    Returns (candidates, graph_index, compare_data), or None for an unknown
+    query type. compare_data is only set for compare queries. The shared
+    driver is only acquired once the query type is known to need Neo4j.
+    """
+    if parsed.query_type not in _QUERY_TYPES:
+        return None
+    driver = driver or get_shared_driver()
 
-        elif parsed.query_type == "acquisition_target":
-            candidates = get_acquisition_targets(driver, parsed.acquirer, parsed.target_company)
-            # Always use strategic_acquirer persona for acquisition queries
-            acq_persona = get_persona("strategic_acquirer")
-            ranked = rank_candidates(candidates, acq_persona, acquirer=parsed.acquirer)
+    if parsed.query_type == "competitors_to":
+        candidates, graph_index = get_candidates_and_graph(
+            driver, "competitors_to", company_id=parsed.target_company
+        )
+        return candidates, graph_index, None
 
-            company_ids = [parsed.acquirer, parsed.target_company] + [r.company_id for r in ranked[:10]]
-            graph = get_graph_data(driver, company_ids, center_id=parsed.target_company)
+    if parsed.query_type == "compare":
+        compare_data, graph_index = get_candidates_and_graph(
+            driver, "compare", company_a=parsed.target_company, company_b=parsed.compare_company
+        )
+        # Rank the two companies + common competitors together
+        all_candidates = []
+        for key in ("company_a", "company_b"):
+            if compare_data[key]:
+                all_candidates.append(compare_data[key])
+        all_candidates.extend(compare_data.get("common_competitors", []))
+        return all_candidates, graph_index, compare_data
 
-            return SearchResult(
-                query=parsed,
-                persona="strategic_acquirer",
-                persona_display=acq_persona.display_name,
-                results=ranked,
-                graph_data=graph,
-                metadata=_meta(t_start, len(candidates)),
-            )
+    if parsed.query_type == "acquisition_target":
+        candidates, graph_index = get_candidates_and_graph(
+            driver, "acquisition_target", acquirer=parsed.acquirer, compete_with=parsed.target_company
+        )
+        return candidates, graph_index, None
 
-        elif parsed.query_type == "attribute_search":
-            candidates = get_attribute_ranked(driver, parsed.attribute or "moat_durability")
-            ranked = rank_candidates(candidates, persona_config)
+    # attribute_search
+    candidates, graph_index = get_candidates_and_graph(
+        driver, "attribute_search", attribute=parsed.attribute or "moat_durability"
+    )
+    return candidates, graph_index, None
 
-            company_ids = [r.company_id for r in ranked[:10]]
-            graph = get_graph_data(driver, company_ids)
 
-            return SearchResult(
-                query=parsed,
-                persona=active_persona,
-                persona_display=persona_config.display_name,
-                results=ranked,
-                graph_data=graph,
-                metadata=_meta(t_start, len(candidates)),
-            )
+def _rank_and_build(parsed: ParsedQuery, retrieved: tuple | None, persona: str,
+                    t_start: int, ranked: list[RankedResult] | None = None) -> SearchResult:
+    """Persona-dependent half of a search: rank and assemble the SearchResult.
+
+    Pure Python, no I/O. `ranked` may carry a ranking already computed for
+    the active persona (see search_all_personas).
+    """
+    active_persona = _active_persona(parsed, persona)
+    persona_config = get_persona(active_persona)
 
+    if retrieved is None:
         # Fallback
         return SearchResult(
             query=parsed,
@@ -133,24 +207,80 @@ def search(query: str, persona: str = "value_investor") -> SearchResult:
             metadata={"error": "Unknown query type", "elapsed_ms": _elapsed(t_start)},
         )
 
-    finally:
-        driver.close()
+    candidates, graph_index, compare_data = retrieved
+    if ranked is None:
+        ranked = rank_candidates(candidates, persona_config, acquirer=parsed.acquirer)
+
+    # The graph shows the anchors plus the ten best-ranked companies
+    top_ids = [r.company_id for r in islice(ranked, 10)]
+    if parsed.query_type == "competitors_to":
+        graph = graph_index.subgraph([parsed.target_company] + top_ids, center_id=parsed.target_company)
+    elif parsed.query_type == "compare":
+        company_ids = [parsed.target_company, parsed.compare_company] + [c.company_id for c in compare_data.get("common_competitors", [])]
+        graph = graph_index.subgraph(company_ids)
+    elif parsed.query_type == "acquisition_target":
+        graph = graph_index.subgraph([parsed.acquirer, parsed.target_company] + top_ids, center_id=parsed.target_company)
+    else:
+        graph = graph_index.subgraph(top_ids)
+
+    return SearchResult(
+        query=parsed,
+        persona=active_persona,
+        persona_display=persona_config.display_name,
+        results=ranked,
+        compare_data=compare_data,
+        graph_data=graph,
+        metadata=_meta(t_start, len(candidates)),
+    )
 
 
 def search_all_personas(query: str) -> dict[str, SearchResult]:
-    """Run a query across all 5 personas. Returns {persona_name: SearchResult}."""
-    results = {}
-    for persona_name in list_personas():
-        results[persona_name] = search(query, persona=persona_name)
-    return results
+    """Run a query across all 5 personas. Returns {persona_name: SearchResult}.
+
+    Candidates don't depend on the persona, so they are retrieved once and
+    only the ranking runs per persona (batched, so shared attribute columns
+    are normalized once). If retrieval raises, every persona gets an empty
+    SearchResult with the error in metadata.
+    """
+    t_start = time.perf_counter_ns()
+    parsed, connect_error = _parse_while_connecting(query)
+    persona_names = _PERSONA_NAMES
+    try:
+        if connect_error is not None:
+            raise connect_error
+        retrieved = _retrieve(parsed)
+    except Exception as e:
+        logger.error("Search failed for query=%r: %s", query, e, exc_info=True)
+        return {
+            persona_name: SearchResult(
+                query=parsed,
+                persona=persona_name,
+                persona_display=PERSONAS[persona_name].display_name,
+                metadata={"error": str(e)},
+            )
+            for persona_name in persona_names
+        }
+
+    # Several personas can collapse onto one active persona (query-embedded
+    # persona, acquisition queries); rank each distinct one once
+    active = {name: _active_persona(parsed, name) for name in persona_names}
+    rankings = {}
+    if retrieved is not None:
+        rankings = rank_candidates_batch(
+            retrieved[0], [get_persona(name) for name in dict.fromkeys(active.values())]
+        )
+    return {
+        name: _rank_and_build(parsed, retrieved, name, t_start, rankings.get(active[name]))
+        for name in persona_names
+    }
 
 
-def _meta(t_start: float, candidate_count: int) -> dict:
+def _meta(t_start: int, candidate_count: int) -> dict:
     return {
         "elapsed_ms": _elapsed(t_start),
         "candidate_count": candidate_count,
     }
 
 
-def _elapsed(t_start: float) -> int:
-    return int((time.time() - t_start) * 1000)
+def _elapsed(t_start: int) -> int:
+    return (time.perf_counter_ns() - t_start) // 1_000_000
@@ -1,24 +1,32 @@
 """
 End-to-end verification script for InvestorLens search pipeline.
 Runs all 6 demo queries across all 5 personas and prints results.
+
+    python3 backend/search/test_queries.py [--parallel]
 """
+import argparse
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+from graph.queries import get_shared_driver
 from search.search_pipeline import search, search_all_personas
-from search.persona_configs import list_personas
-
-DEMO_QUERIES = [
-    "Competitors to Snowflake",
-    "Compare Databricks vs Snowflake through a PE lens",
-    "Best acquisition target for Google to compete with Palantir",
-    "Competitors to C3 AI",
-    "Compare Pinecone vs Weaviate through a VC lens",
-    "Which data infrastructure companies have the strongest moats?",
+
+# (query, persona, also show top-3 for every persona, note)
+QUERY_PLAN = [
+    ("Competitors to Snowflake", "value_investor", True, "Hero query — must show distinct top-3 per persona."),
+    ("Compare Databricks vs Snowflake through a PE lens", "value_investor", False, ""),
+    ("Best acquisition target for Google to compete with Palantir", "value_investor", False, ""),
+    ("Competitors to C3 AI", "value_investor", True, "Personally validatable."),
+    ("Compare Pinecone vs Weaviate through a VC lens", "value_investor", False, ""),
+    ("Which data infrastructure companies have the strongest moats?", "value_investor", False, ""),
 ]
 
+DEMO_QUERIES = [query for query, _, _, _ in QUERY_PLAN]
+
 
 def print_separator(char="=", width=80):
     print(char * width)
@@ -26,7 +34,10 @@ def print_separator(char="=", width=80):
 
 def run_single_query(query: str, persona: str = "value_investor"):
     """Run a single query and print results."""
-    result = search(query, persona=persona)
+    print_single_result(search(query, persona=persona))
+
+
+def print_single_result(result):
     print(f"  Persona: {result.persona_display} ({result.persona})")
     print(f"  Type: {result.query.query_type}")
     print(f"  Target: {result.query.target_company}")
@@ -41,9 +52,9 @@ def run_single_query(query: str, persona: str = "value_investor"):
     print()
 
     if result.results:
-        for r in result.results[:5]:
-            breakdown_str = "  ".join(f"{k}={v:.3f}" for k, v in sorted(r.score_breakdown.items(), key=lambda x: -x[1]))
-            edge_types = [e.get("type", "?") for e in r.graph_context[:3]]
+        for r in islice(result.results, 5):
+            breakdown_str = "  ".join(f"{k}={v:.3f}" for k, v in r.score_breakdown_sorted)
+            edge_types = [e.get("type", "?") for e in islice(r.graph_context, 3)]
             print(f"  #{r.rank:2d}  {r.name:30s}  score={r.composite_score:.4f}  edges={edge_types}")
             print(f"       {breakdown_str}")
     else:
@@ -52,52 +63,48 @@ def run_single_query(query: str, persona: str = "value_investor"):
 
 def run_multi_persona(query: str):
     """Run a query across all personas and print top-3 per persona."""
+    print_multi_persona(search_all_personas(query))
+
+
+def print_multi_persona(results: dict):
     print("\n  --- All Personas Top-3 ---")
-    results = search_all_personas(query)
-    for persona_name in list_personas():
-        sr = results[persona_name]
-        top3 = [f"{r.name} ({r.composite_score:.3f})" for r in sr.results[:3]]
+    for sr in results.values():
+        top3 = (f"{r.name} ({r.composite_score:.3f})" for r in islice(sr.results, 3))
         print(f"  {sr.persona_display:22s}: {' | '.join(top3)}")
 
 
-def main():
+def _run_plan_entry(query: str, persona: str, multi: bool) -> tuple:
+    """Search one QUERY_PLAN entry; returns (result, all-persona results or None)."""
+    return search(query, persona=persona), search_all_personas(query) if multi else None
+
+
+def main(parallel: bool = False):
     print()
     print_separator("=")
     print("  InvestorLens Search Pipeline — End-to-End Verification")
     print_separator("=")
 
-    # --- Query 1: Competitors to Snowflake (HERO QUERY) ---
-    print_separator("-")
-    print("\n  QUERY 1 (Hero): \"Competitors to Snowflake\"")
-    print("  Must show distinct top-3 per persona.\n")
-    run_single_query("Competitors to Snowflake", "value_investor")
-    run_multi_persona("Competitors to Snowflake")
-
-    # --- Query 2: Compare Databricks vs Snowflake through PE lens ---
-    print_separator("-")
-    print("\n  QUERY 2: \"Compare Databricks vs Snowflake through a PE lens\"\n")
-    run_single_query("Compare Databricks vs Snowflake through a PE lens")
-
-    # --- Query 3: Acquisition target ---
-    print_separator("-")
-    print("\n  QUERY 3: \"Best acquisition target for Google to compete with Palantir\"\n")
-    run_single_query("Best acquisition target for Google to compete with Palantir")
-
-    # --- Query 4: Competitors to C3 AI (personally validatable) ---
-    print_separator("-")
-    print("\n  QUERY 4: \"Competitors to C3 AI\"\n")
-    run_single_query("Competitors to C3 AI", "value_investor")
-    run_multi_persona("Competitors to C3 AI")
-
-    # --- Query 5: Compare Pinecone vs Weaviate through VC lens ---
-    print_separator("-")
-    print("\n  QUERY 5: \"Compare Pinecone vs Weaviate through a VC lens\"\n")
-    run_single_query("Compare Pinecone vs Weaviate through a VC lens")
-
-    # --- Query 6: Attribute search ---
-    print_separator("-")
-    print("\n  QUERY 6: \"Which data infrastructure companies have the strongest moats?\"\n")
-    run_single_query("Which data infrastructure companies have the strongest moats?")
+    # Connect once up front; every query reuses the shared driver's pool
+    get_shared_driver()
+
+    plan = [(query, persona, multi) for query, persona, multi, _ in QUERY_PLAN]
+    if parallel:
+        # Queries run concurrently; output still follows plan order
+        with ThreadPoolExecutor(max_workers=len(plan)) as pool:
+            futures = [pool.submit(_run_plan_entry, *entry) for entry in plan]
+            outcomes = [future.result() for future in futures]
+    else:
+        outcomes = (_run_plan_entry(*entry) for entry in plan)
+
+    for i, ((query, _, _, note), (result, multi_results)) in enumerate(zip(QUERY_PLAN, outcomes), 1):
+        print_separator("-")
+        print(f"\n  QUERY {i}: \"{query}\"")
+        if note:
+            print(f"  {note}")
+        print()
+        print_single_result(result)
+        if multi_results is not None:
+            print_multi_persona(multi_results)
 
     print_separator("=")
     print("  Verification complete.")
@@ -105,4 +112,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="End-to-end verification of the search pipeline")
+    parser.add_argument("--parallel", action="store_true", help="Run the demo queries concurrently")
+    args = parser.parse_args()
+    main(parallel=args.parallel)